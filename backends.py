@@ -0,0 +1,132 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Union
+import os
+import time
+
+from dotenv import load_dotenv
+
+from consts import MODEL_BACKENDS, DEFAULT_BACKEND
+
+load_dotenv()
+
+
+@dataclass
+class Backend:
+    name: str
+    base_url: str  # OpenAI-compatible root, requests go to <base_url>/chat/completions
+    api_key_env: Optional[str] = None  # No Authorization header without it
+    extra_headers: Dict[str, str] = field(default_factory=dict)
+    structured_output: str = "json_schema"  # "json_schema", "json_object" or "none"
+    multi_sample: bool = True  # Try "n" before falling back to one request per sample
+    cache_control: bool = False  # Accepts cache_control on content parts
+    usage_accounting: bool = False  # OpenRouter "usage": {"include": true}
+    max_concurrency: int = 16  # Requests in flight at once
+    timeout: float = 60
+    local: bool = False  # Runs on our hardware: no cost, throughput is reported
+    model_prefix: str = ""  # Removed from the model name sent in the request
+    # How a reasoning level is sent: "reasoning" (OpenRouter object, effort or token budget),
+    # "reasoning_effort" (OpenAI-compatible, effort only) or "none"
+    reasoning_format: str = "reasoning_effort"
+    provider_routing: bool = False  # Accepts OpenRouter "provider" preferences
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url.rstrip('/')}/chat/completions"
+
+    def headers(self) -> Dict[str, str]:
+        headers = dict(self.extra_headers)
+        api_key = os.getenv(self.api_key_env) if self.api_key_env else None
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        return headers
+
+    def reasoning_params(self, level: Union[str, int]) -> Optional[Dict[str, Any]]:
+        # None when the level can't be expressed for this backend
+        if self.reasoning_format == "reasoning":
+            key = "max_tokens" if isinstance(level, int) else "effort"
+            return {"reasoning": {key: level}}
+        if self.reasoning_format == "reasoning_effort" and isinstance(level, str):
+            return {"reasoning_effort": level}
+        return None
+
+    def request_model(self, model_name: str) -> str:
+        if self.model_prefix and model_name.startswith(self.model_prefix):
+            return model_name[len(self.model_prefix) :]
+        return model_name
+
+
+@dataclass
+class BackendStats:
+    requests: int = 0
+    failures: int = 0
+    completion_tokens: int = 0
+    first_start: Optional[float] = None
+    last_end: Optional[float] = None
+
+    def record(self, start: float, completion_tokens: Optional[int]) -> None:
+        end = time.perf_counter()
+        self.first_start = (
+            start if self.first_start is None else min(self.first_start, start)
+        )
+        self.last_end = end if self.last_end is None else max(self.last_end, end)
+        if completion_tokens is None:
+            self.failures += 1
+            return
+        self.requests += 1
+        self.completion_tokens += completion_tokens
+
+    @property
+    def wall_time(self) -> float:
+        if self.first_start is None or self.last_end is None:
+            return 0.0
+        return self.last_end - self.first_start
+
+    @property
+    def tokens_per_second(self) -> float:
+        # Aggregate throughput over the session, all concurrent requests included
+        return self.completion_tokens / self.wall_time if self.wall_time else 0.0
+
+
+BACKENDS: Dict[str, Backend] = {
+    backend.name: backend
+    for backend in (
+        Backend(
+            "openrouter",
+            os.getenv("OPEN_ROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
+            api_key_env="OPEN_ROUTER_API_KEY",
+            extra_headers={"HTTP-Referer": "https://openrouter.ai"},
+            cache_control=True,
+            usage_accounting=True,
+            reasoning_format="reasoning",
+            provider_routing=True,
+        ),
+        Backend(
+            "llamacpp",  # llama-server --jinja
+            os.getenv("LLAMACPP_BASE_URL", "http://127.0.0.1:8080/v1"),
+            api_key_env="LLAMACPP_API_KEY",
+            multi_sample=False,
+            max_concurrency=1,  # Match --parallel of the server
+            timeout=1800,
+            local=True,
+            model_prefix="llamacpp/",
+        ),
+        Backend(
+            "vllm",  # vllm serve <model> on a CPU build
+            os.getenv("VLLM_BASE_URL", "http://127.0.0.1:8001/v1"),
+            api_key_env="VLLM_API_KEY",
+            max_concurrency=4,
+            timeout=1800,
+            local=True,
+            model_prefix="vllm/",
+        ),
+    )
+}
+
+
+def backend_for(model_name: str) -> Backend:
+    name = MODEL_BACKENDS.get(model_name)
+    if name is None:  # "llamacpp/qwen2.5-7b-instruct" goes to llamacpp
+        prefix = model_name.split("/", 1)[0]
+        backend = BACKENDS.get(prefix)
+        name = prefix if backend and backend.model_prefix else DEFAULT_BACKEND
+    return BACKENDS[name]
@@ -0,0 +1 @@
+# Makes the root modules importable from tests/, run the suite with: python -m pytest
@@ -0,0 +1,59 @@
+from typing import Any, Dict, List, Union
+
+# Suites benchmarked when none is given on the command line, see suites.py
+DEFAULT_SUITES: List[str] = ["v2"]
+MODELS = [
+    # "google/gemini-3-pro-preview",
+    "google/gemini-3.1-pro-preview",
+    # "google/gemini-3-flash-preview",
+    # "google/gemini-2.5-pro",
+    # "google/gemini-2.5-flash",
+    # "anthropic/claude-sonnet-4.5",
+    # "anthropic/claude-opus-4.5",
+    # "moonshotai/kimi-k2-thinking",
+    # "moonshotai/kimi-k2-0905",
+    # "deepseek/deepseek-chat-v3-0324",
+    # "deepseek/deepseek-r1-0528",
+    # "openai/gpt-5.2",
+    # "openai/gpt-5.2-chat",
+    # "openai/gpt-5.1",
+    # "openai/gpt-5.1-chat",
+    # "openai/gpt-5",
+    # "openai/gpt-5-chat",
+    # "openai/gpt-5-mini",
+    # "openai/gpt-4o",
+    # "mistralai/mistral-nemo",
+    # "x-ai/grok-4.1-fast",
+    # "x-ai/grok-4",
+    # "x-ai/grok-4-fast",
+    # "xiaomi/mimo-v2-flash:free"
+]
+# Completions requested at once with "n", each one is scored as its own run
+# Models that don't support it fall back to one request per sample
+SAMPLES_PER_REQUEST = 4
+# Throttled (429) or timed out requests are sent again, waiting RETRY_BACKOFF seconds, then twice as long
+MAX_RETRIES = 3
+RETRY_BACKOFF = 2.0
+# Mark the prompt as cacheable (cache_control) for providers that need it explicitly
+PROMPT_CACHING = True
+# Model name -> backend name in backends.BACKENDS, for models outside DEFAULT_BACKEND
+# Names starting with a local backend prefix ("llamacpp/", "vllm/") are routed automatically
+MODEL_BACKENDS: Dict[str, str] = {
+    # "llamacpp/qwen2.5-7b-instruct": "llamacpp",
+}
+DEFAULT_BACKEND = "openrouter"
+# Model name -> OpenRouter provider routing preferences, sent as "provider" in the request
+# https://openrouter.ai/docs/features/provider-routing
+PROVIDER_PREFERENCES: Dict[str, Dict[str, Any]] = {
+    # "deepseek/deepseek-r1-0528": {"order": ["DeepInfra"], "allow_fallbacks": False},  # Pin
+    # "moonshotai/kimi-k2-0905": {"quantizations": ["fp8", "bf16"], "sort": "throughput"},
+}
+# Reasoning levels each model is run at, every level is stored as its own variant "<model>@<level>"
+# Efforts ("minimal", "low", "medium", "high") or reasoning token budgets (int, OpenRouter only)
+# Empty: one run per model with the provider's default
+REASONING_SWEEP: List[Union[str, int]] = [
+    # "low",
+    # "medium",
+    # "high",
+]
+MAX_RESPONSE_BYTES = 4 * 2**20  # Larger responses are discarded while reading
@@ -0,0 +1,444 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Union, List, Optional, Tuple
+from datetime import datetime, timezone
+import logging
+from pathlib import Path
+import json
+import statistics
+import math
+
+from details_store import DetailsStore
+from sketch import QuantileSketch
+from suites import Suite
+
+QUANTILES = (0.5, 0.9, 0.99)  # Reported as p50, p90 and p99
+# Completion tokens and latencies kept run by run, older runs only live in the sketches
+RECENT_SAMPLES = 1000
+
+
+def aligned(values: list, run_count: int, index: int, default: Any = None) -> Any:
+    # Lists added after the first runs were stored only cover the latest runs
+    offset = run_count - len(values)
+    return values[index - offset] if index >= offset else default
+
+
+@dataclass
+class Model:
+    name: str
+    scores: list[float] = field(default_factory=list)
+    completions_tokens: list[Optional[int]] = field(
+        default_factory=list
+    )  # Latest RECENT_SAMPLES runs, see aligned, None when unknown
+    propositions: list[Dict[str, str]] = field(
+        default_factory=list
+    )  # Added logging variable
+    recoveries: list[Dict[str, Union[str, int]]] = field(
+        default_factory=list
+    )  # How each proposition was decoded, see decoding.py
+    # Usage of each run, None when unknown (truncated response, imported runs)
+    prompt_tokens: list[Optional[int]] = field(default_factory=list)
+    # Prompt tokens read from cache
+    cached_tokens: list[Optional[int]] = field(default_factory=list)
+    # In credits, as reported by OpenRouter
+    costs: list[Optional[float]] = field(default_factory=list)
+    timestamps: list[str] = field(default_factory=list)  # ISO 8601, UTC
+    latencies: list[float] = field(
+        default_factory=list
+    )  # Seconds per request, latest RECENT_SAMPLES runs
+    details_refs: list[Optional[str]] = field(
+        default_factory=list
+    )  # Keys in the details store, see get_details
+    providers: list[Optional[str]] = field(
+        default_factory=list
+    )  # Upstream provider OpenRouter routed each run to
+    request_ids: list[Optional[str]] = field(
+        default_factory=list
+    )  # Shared by the choices of one request, see tokens_per_second
+    avg_score: float = field(init=False)
+    ci_score: float = field(init=False)
+    avg_token_usage: float = field(init=False)
+    cache_hit_rate: float = field(init=False)
+    avg_cost: float = field(init=False)
+    avg_latency: float = field(init=False)
+    run_count: int = field(init=False)
+    token_sketch: Optional[QuantileSketch] = field(
+        default=None, repr=False
+    )  # Completion tokens distribution, built from the lists when not stored
+    latency_sketch: Optional[QuantileSketch] = field(default=None, repr=False)
+    owner: Optional["Models"] = field(
+        default=None, repr=False, compare=False
+    )  # Results of the suite the model belongs to
+
+    def __post_init__(self) -> None:
+        if self.token_sketch is None:
+            self.token_sketch = QuantileSketch.from_values(
+                tokens for tokens in self.completions_tokens if tokens is not None
+            )
+        if self.latency_sketch is None:
+            self.latency_sketch = QuantileSketch.from_values(
+                latency for latency in self.latencies if latency > 0
+            )
+        self.trim_samples()
+        if self.owner is not None:
+            self.owner.add_model(self)
+        self.update_variables()
+
+    def __repr__(self) -> str:
+        return f"Model class of {self.name}: ({self.avg_score},{self.avg_token_usage})"
+
+    def to_dict(
+        self,
+    ) -> Dict[str, Union[int, str, List[float], List[int], List[Dict[str, str]]]]:
+        return {
+            "scores": self.scores,
+            "completions_tokens": self.completions_tokens,
+            "propositions": self.propositions,
+            "recoveries": self.recoveries,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "costs": self.costs,
+            "timestamps": self.timestamps,
+            "latencies": self.latencies,
+            "details_refs": self.details_refs,
+            "providers": self.providers,
+            "request_ids": self.request_ids,
+            "token_sketch": self.token_sketch.to_dict(),
+            "latency_sketch": self.latency_sketch.to_dict(),
+            "run_count": self.run_count,
+        }
+
+    def update_variables(self) -> None:
+        self.run_count = len(self.scores)
+        if self.scores:
+            self.avg_score = round(sum(self.scores) / len(self.scores), 2)
+            if self.run_count > 1:
+                stdev = statistics.stdev(self.scores)
+                self.ci_score = 1.96 * stdev / math.sqrt(self.run_count)
+            else:
+                self.ci_score = 0.0
+        else:
+            self.avg_score = 0.0
+            self.ci_score = 0.0
+
+        # Over every run, the lists only keep the latest ones
+        self.avg_token_usage = round(self.token_sketch.mean, 2)
+
+        # Usage left unknown (None) by a run is left out of the rates and averages
+        known = [
+            (prompt, cached)
+            for prompt, cached in zip(self.prompt_tokens, self.cached_tokens)
+            if prompt is not None and cached is not None
+        ]
+        prompt_tokens = sum(prompt for prompt, _ in known)
+        if prompt_tokens:
+            self.cache_hit_rate = round(
+                100 * sum(cached for _, cached in known) / prompt_tokens, 2
+            )
+        else:
+            self.cache_hit_rate = 0.0
+
+        costs = [cost for cost in self.costs if cost is not None]
+        if costs:
+            self.avg_cost = sum(costs) / len(costs)
+        else:
+            self.avg_cost = 0.0
+
+        self.avg_latency = round(self.latency_sketch.mean, 2)
+
+    @property
+    def token_quantiles(self) -> List[float]:
+        return self.token_sketch.quantiles(*QUANTILES)
+
+    @property
+    def latency_quantiles(self) -> List[float]:
+        return self.latency_sketch.quantiles(*QUANTILES)
+
+    def trim_samples(self) -> None:
+        # The sketches hold the distributions, raw samples are only kept for recent runs
+        del self.completions_tokens[:-RECENT_SAMPLES]
+        del self.latencies[:-RECENT_SAMPLES]
+
+    def merge(self, other: "Model") -> None:
+        # Runs of the same model from another shard (results file or session)
+        for key, default in RUN_DEFAULTS.items():
+            values = getattr(other, key)
+            # Padded so that the lists still cover the latest runs once joined
+            padding = [default] * (other.run_count - len(values))
+            getattr(self, key).extend(padding + values)
+        self.token_sketch.merge(other.token_sketch)
+        self.latency_sketch.merge(other.latency_sketch)
+        self.trim_samples()
+        self.update_variables()
+
+    @property
+    def uncached_tokens(self) -> list[Optional[int]]:
+        uncached = []
+        for i in range(self.run_count):
+            prompt = aligned(self.prompt_tokens, self.run_count, i)
+            cached = aligned(self.cached_tokens, self.run_count, i)
+            known = prompt is not None and cached is not None
+            uncached.append(prompt - cached if known else None)
+        return uncached
+
+    def add_score(
+        self,
+        proposition: Dict[str, str],
+        completion_tokens: Optional[int],
+        recovery: Optional[Dict[str, Union[str, int]]] = None,
+        prompt_tokens: Optional[int] = 0,
+        cached_tokens: Optional[int] = 0,
+        cost: Optional[float] = 0.0,
+        latency: float = 0.0,
+        details_ref: Optional[str] = None,
+        provider: Optional[str] = None,
+        request_id: Optional[str] = None,
+    ) -> None:
+        suite = self.owner.suite
+        if len(proposition) != len(suite.solution):
+            logging.warning(
+                f"{self.name}: Length of proposition and solution are different: {len(proposition)} vs {len(suite.solution)}"
+            )
+
+        timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+        self.scores.append(suite.score(proposition))
+        self.completions_tokens.append(completion_tokens)
+        self.propositions.append(proposition)  # Log the proposition
+        self.recoveries.append(recovery or {})
+        self.prompt_tokens.append(prompt_tokens)
+        self.cached_tokens.append(cached_tokens)
+        self.costs.append(cost)
+        self.timestamps.append(timestamp)
+        self.latencies.append(latency)
+        self.details_refs.append(details_ref)
+        self.providers.append(provider)
+        self.request_ids.append(request_id)
+        if completion_tokens is not None:
+            self.token_sketch.add(completion_tokens)
+        if latency > 0:
+            self.latency_sketch.add(latency)
+        self.trim_samples()
+        self.update_variables()
+
+        if self.owner.store is not None:
+            self.owner.store.add_run(
+                self.name,
+                timestamp,
+                self.scores[-1],
+                completion_tokens,
+                proposition,
+                suite.solution,
+                recovery=recovery,
+                prompt_tokens=prompt_tokens,
+                cached_tokens=cached_tokens,
+                cost=cost,
+                latency=latency,
+                details_ref=details_ref,
+                provider=provider,
+                request_id=request_id,
+            )
+
+    def provider_runs(self) -> Dict[Optional[str], List[int]]:
+        # Run indexes per upstream provider, None for runs recorded without one
+        runs: Dict[Optional[str], List[int]] = {}
+        for i in range(self.run_count):
+            provider = aligned(self.providers, self.run_count, i)
+            runs.setdefault(provider, []).append(i)
+        return runs
+
+    def tokens_per_second(self, indexes: Optional[List[int]] = None) -> float:
+        # The choices of a request (SAMPLES_PER_REQUEST) share its latency, counted once
+        tokens = 0
+        latencies: Dict[Union[str, int], float] = {}
+        for i in range(self.run_count) if indexes is None else indexes:
+            latency = aligned(self.latencies, self.run_count, i, 0.0)
+            completion_tokens = aligned(self.completions_tokens, self.run_count, i)
+            if latency <= 0 or completion_tokens is None:
+                continue
+            tokens += completion_tokens
+            # Runs recorded without a request id were one request each
+            latencies[aligned(self.request_ids, self.run_count, i) or i] = latency
+        total_latency = sum(latencies.values())
+        return tokens / total_latency if total_latency else 0.0
+
+    def get_details(self, run_index: int) -> Dict[str, Any]:
+        # Read lazily, the reasoning of a run can be large
+        return self.owner.details.get(
+            aligned(self.details_refs, self.run_count, run_index)
+        )
+
+
+# Per-run lists of Model and the value of a run missing from them
+RUN_DEFAULTS: Dict[str, Any] = {
+    "scores": 0.0,
+    "completions_tokens": None,
+    "propositions": {},
+    "recoveries": {},
+    "prompt_tokens": None,
+    "cached_tokens": None,
+    "costs": None,
+    "timestamps": None,
+    "latencies": 0.0,
+    "details_refs": None,
+    "providers": None,
+    "request_ids": None,
+}
+
+
+@dataclass
+class Models:
+    suite: Suite
+    dico: Dict[str, Model] = field(default_factory=dict)
+    parsed_file: bool = False
+    store: Optional[Any] = None  # SQLiteStore, results are written as they land
+    details: DetailsStore = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.details = DetailsStore(self.suite.details_dir)
+        if self.suite.results_db is not None:
+            self.use_sqlite(self.suite.results_db)
+
+    def to_dict(self) -> Dict[str, Dict[str, Union[List[float], List[int], int]]]:
+        return {model.name: model.to_dict() for model in self.dico.values()}
+
+    def add_model(self, model: Model) -> None:
+        self.dico[model.name] = model
+        model.owner = self
+
+    def get_model(self, name: str) -> Model:
+        if name not in self.dico:
+            Model(name, owner=self)
+        return self.dico[name]
+
+    def get_models_avg_score(self) -> List[Tuple[str, float, float, int]]:
+        scores = [
+            (name, model.avg_score, model.ci_score, model.run_count)
+            for name, model in self.dico.items()
+        ]
+        return sorted(scores, key=lambda x: x[1], reverse=True)
+
+    def get_models_avg_tokens(
+        self,
+    ) -> List[Tuple[str, float, int, float, float, float]]:
+        # (name, average, run count, p50, p90, p99)
+        tokens = [
+            (name, model.avg_token_usage, model.run_count, *model.token_quantiles)
+            for name, model in self.dico.items()
+        ]
+        return sorted(tokens, key=lambda x: x[1], reverse=False)
+
+    def get_models_cache_stats(self) -> List[Tuple[str, float, float, int]]:
+        stats = [
+            (name, model.cache_hit_rate, model.avg_cost, model.run_count)
+            for name, model in self.dico.items()
+        ]
+        return sorted(stats, key=lambda x: x[2])
+
+    def get_models_latency_quantiles(
+        self,
+    ) -> List[Tuple[str, float, float, float, float]]:
+        # (name, average, p50, p90, p99), fastest first
+        latencies = [
+            (name, model.avg_latency, *model.latency_quantiles)
+            for name, model in self.dico.items()
+            if model.latency_sketch.count
+        ]
+        return sorted(latencies, key=lambda x: x[1])
+
+    def get_provider_stats(
+        self,
+    ) -> List[Tuple[str, Optional[str], int, float, float, float]]:
+        # (model, provider, runs, average score, average latency, tokens/s), fastest first per model
+        stats = []
+        for name, model in self.dico.items():
+            for provider, indexes in model.provider_runs().items():
+                latencies = [
+                    latency
+                    for i in indexes
+                    if (latency := aligned(model.latencies, model.run_count, i, 0.0))
+                    > 0
+                ]
+                stats.append(
+                    (
+                        name,
+                        provider,
+                        len(indexes),
+                        round(sum(model.scores[i] for i in indexes) / len(indexes), 2),
+                        round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+                        round(model.tokens_per_second(indexes), 1),
+                    )
+                )
+        return sorted(stats, key=lambda x: (x[0], -x[5]))
+
+    def merge(self, other: "Models") -> "Models":
+        # Combine the results of another shard of the same suite
+        for name, model in list(other.dico.items()):
+            if name in self.dico:
+                self.dico[name].merge(model)
+            else:
+                self.add_model(model)
+        return self
+
+    def get_run_counts(self) -> List[Tuple[str, int]]:
+        return [(name, model.run_count) for name, model in self.dico.items()]
+
+    def use_sqlite(self, path: Path) -> None:
+        from sqlite_store import SQLiteStore
+
+        self.store = SQLiteStore(path)
+
+    def parse_results_file(self, path: Optional[Path] = None) -> "Models":
+        if self.store is not None:
+            self.parsed_file = True
+            self.store.load_models(self)
+            return self
+
+        path = path or self.suite.results_file
+        if not path.exists():
+            logging.info("No results file has been found.")
+            return
+
+        def sketch(values: Optional[Dict[str, Any]]) -> Optional[QuantileSketch]:
+            return QuantileSketch.from_dict(values) if values else None
+
+        self.parsed_file = True
+        with open(path, "r", encoding="utf-8") as f:
+            raw_results: Dict[str, Dict[Union[int, str, Dict[str, str]]]] = json.load(f)
+            for name, values in raw_results.items():
+                completions_tokens = values.get("completions_tokens")
+                scores = values.get("scores")
+                run_count = values.get("run_count")
+                if not (scores or completions_tokens or run_count):
+                    continue
+
+                Model(
+                    name,
+                    scores,
+                    completions_tokens,
+                    propositions=values.get("propositions", []),
+                    recoveries=values.get("recoveries", []),
+                    prompt_tokens=values.get("prompt_tokens", []),
+                    cached_tokens=values.get("cached_tokens", []),
+                    costs=values.get("costs", []),
+                    timestamps=values.get("timestamps", []),
+                    latencies=values.get("latencies", []),
+                    details_refs=values.get("details_refs", []),
+                    providers=values.get("providers", []),
+                    request_ids=values.get("request_ids", []),
+                    token_sketch=sketch(values.get("token_sketch")),
+                    latency_sketch=sketch(values.get("latency_sketch")),
+                    owner=self,
+                )
+
+        return self
+
+    def save_to_file(self, path: Optional[Path] = None) -> None:
+        if self.store is not None:  # Runs are already in the database
+            return
+
+        path = path or self.suite.results_file
+        if not path.parent.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.to_dict(), indent=4))
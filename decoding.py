@@ -0,0 +1,224 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+import json
+import re
+
+try:  # orjson is optional, it only speeds up the happy path
+    import orjson
+
+    def _loads(text: str) -> Any:
+        return orjson.loads(text)
+
+except ImportError:
+    _loads = json.loads
+
+_decoder = json.JSONDecoder()
+_details_value = re.compile(r'"details"\s*:\s*(?=")')
+_content_value = re.compile(r'"content"\s*:\s*(?=")')
+_cut_escape = re.compile(r"(\\+)(u[0-9a-fA-F]{0,3})?$")
+
+
+@dataclass
+class DecodedResponse:
+    proposition: Dict[str, str] = field(default_factory=dict)
+    details: str = ""
+    mode: str = "empty"  # "strict", "salvaged" or "empty"
+    recovered: int = 0
+    dropped: int = 0
+
+    def to_record(self) -> Dict[str, Union[str, int]]:
+        return {"mode": self.mode, "recovered": self.recovered, "dropped": self.dropped}
+
+
+def _normalize_key(key: Any) -> str:
+    return str(key).strip().lower().replace("-", "_").replace(" ", "_")
+
+
+def _normalize_word_num(value: Any) -> Optional[str]:
+    text = str(value).strip().rstrip(".")
+    if not text.isdigit():
+        return None
+    return str(int(text))
+
+
+def _normalize_answer(value: Any) -> Optional[str]:
+    if not isinstance(value, str):
+        return None
+    answer = "".join(value.split()).upper()  # " n2 " -> "N2", "[a; h]" -> "[A;H]"
+    return answer or None
+
+
+def _normalize_element(element: Any) -> Optional[tuple[str, str]]:
+    if not isinstance(element, dict):
+        return None
+    element = {_normalize_key(k): v for k, v in element.items()}
+    word_num = _normalize_word_num(element.get("word_num"))
+    answer = _normalize_answer(element.get("answer"))
+    if word_num is None or answer is None:
+        return None
+    return word_num, answer
+
+
+def _strip_fences(text: str) -> str:
+    # ```json\n{...}\n``` -> {...}, also when the closing fence got truncated
+    start = text.find("```")
+    if start == -1:
+        return text
+    body_start = text.find("\n", start)
+    if body_start == -1:
+        return text
+    end = text.find("```", body_start)
+    return text[body_start + 1 : end if end != -1 else len(text)]
+
+
+def _find_details(parsed: Any, text: str) -> str:
+    if isinstance(parsed, dict):
+        for key, value in parsed.items():
+            if _normalize_key(key) == "details" and isinstance(value, str):
+                return value
+
+    # Broken object: decode the string after "details": if it is complete
+    match = _details_value.search(text)
+    if match is None:
+        return ""
+    try:
+        details, _ = _decoder.raw_decode(text, match.end())
+    except ValueError:
+        return ""
+    return details if isinstance(details, str) else ""
+
+
+def _find_propositions(parsed: Any) -> Optional[Union[List[Any], Dict[str, Any]]]:
+    if isinstance(parsed, list):
+        return parsed
+    if not isinstance(parsed, dict):
+        return None
+    for key, value in parsed.items():
+        if _normalize_key(key) in ("proposition", "propositions"):
+            return value
+    return None
+
+
+def _parse_object(text: str) -> Any:
+    try:
+        return _loads(text)
+    except ValueError:
+        pass
+
+    # Valid JSON followed (or preceded) by some prose
+    start = min((i for i in (text.find("{"), text.find("[")) if i != -1), default=-1)
+    if start == -1:
+        return None
+    try:
+        parsed, _ = _decoder.raw_decode(text, start)
+    except ValueError:
+        return None
+    return parsed
+
+
+def _salvage_elements(text: str) -> List[Any]:
+    # Decode every complete {...} after the "proposition" key, skipping broken or truncated ones
+    anchor = text.find('"proposition')
+    position = text.find("{", anchor if anchor != -1 else 0)
+    elements = []
+    while position != -1:
+        try:
+            element, end = _decoder.raw_decode(text, position)
+        except ValueError:
+            position = text.find("{", position + 1)
+            continue
+        if not isinstance(element, dict) or not (
+            {"word_num", "answer"} & {_normalize_key(k) for k in element}
+        ):  # A wrapper object, look inside it
+            position = text.find("{", position + 1)
+            continue
+        elements.append(element)
+        position = text.find("{", end)
+    return elements
+
+
+def _collect(
+    decoded: DecodedResponse, entries: Union[List[Any], Dict[str, Any]]
+) -> None:
+    if isinstance(entries, dict):  # {"1": "A", ...} instead of an array
+        entries = [{"word_num": k, "answer": v} for k, v in entries.items()]
+
+    for entry in entries:
+        normalized = _normalize_element(entry)
+        if normalized is None:
+            decoded.dropped += 1
+            continue
+        word_num, answer = normalized
+        decoded.proposition[word_num] = answer
+
+    decoded.recovered = len(decoded.proposition)
+
+
+def loads(raw: Union[str, bytes]) -> Any:
+    return _loads(raw)
+
+
+def _close_string(text: str) -> str:
+    # A JSON string cut short: drop a cut escape sequence, then close it
+    match = _cut_escape.search(text)
+    if match and len(match.group(1)) % 2:  # The last backslash starts the escape
+        text = text[: match.end(1) - 1]
+    return text + '"'
+
+
+def salvage_messages(raw: Union[str, bytes]) -> List[Dict[str, Any]]:
+    # Messages of a chat completion body cut at the size limit, the last content may be cut too
+    text = raw.decode("utf-8", errors="ignore") if isinstance(raw, bytes) else raw
+    messages = []
+    for match in _content_value.finditer(text):
+        try:
+            content, _ = _decoder.raw_decode(text, match.end())
+        except ValueError:
+            try:
+                content = _decoder.decode(_close_string(text[match.end() :]))
+            except ValueError:
+                continue
+        messages.append({"content": content})
+    return messages
+
+
+def message_text(message: Dict[str, Any]) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):  # Content parts: [{"type": "text", "text": ...}]
+        return "".join(
+            part.get("text", "") for part in content if isinstance(part, dict)
+        )
+    return str(content)
+
+
+def decode_proposition(content: str) -> DecodedResponse:
+    decoded = DecodedResponse()
+    if not content:
+        return decoded
+
+    # Fast path: the schema was followed to the letter
+    try:
+        parsed = _loads(content)
+        entries = parsed["proposition"]
+        if isinstance(entries, list):
+            _collect(decoded, entries)
+            if decoded.dropped == 0 and decoded.recovered == len(entries):
+                decoded.mode = "strict"
+                decoded.details = _find_details(parsed, "")
+                return decoded
+            decoded = DecodedResponse()
+    except (ValueError, TypeError, KeyError):
+        pass
+
+    text = _strip_fences(content)
+    parsed = _parse_object(text)
+    decoded.details = _find_details(parsed, text)
+    entries = _find_propositions(parsed)
+    if entries is None:
+        entries = _salvage_elements(text)
+    if isinstance(entries, (list, dict)):
+        _collect(decoded, entries)
+
+    if decoded.recovered:
+        decoded.mode = "salvaged"
+    return decoded
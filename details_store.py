@@ -0,0 +1,43 @@
+from pathlib import Path
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import zlib
+
+# Reasoning returned next to the content, depending on the provider
+REASONING_FIELDS = ("reasoning", "reasoning_content", "reasoning_details")
+
+
+def reasoning_fields(message: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: message[key] for key in REASONING_FIELDS if message.get(key)}
+
+
+class DetailsStore:
+    # Content-addressed, zlib-compressed JSON blobs: <dir>/ab/abcdef....z
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def _path(self, ref: str) -> Path:
+        return self.directory / ref[:2] / f"{ref}.z"
+
+    def put(self, record: Dict[str, Any]) -> str:
+        raw = json.dumps(record, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        ref = hashlib.sha256(raw).hexdigest()
+        path = self._path(ref)
+        if path.exists():  # Same reasoning already stored
+            return ref
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(zlib.compress(raw, 9))
+        os.replace(tmp, path)
+        return ref
+
+    def get(self, ref: Optional[str]) -> Dict[str, Any]:
+        if not ref:
+            return {}
+        path = self._path(ref)
+        if not path.exists():
+            return {}
+        return json.loads(zlib.decompress(path.read_bytes()))
@@ -0,0 +1,211 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import logging
+import math
+import statistics
+import sys
+
+from consts import DEFAULT_SUITES
+from data_structure import Model, Models, aligned
+from suites import load_suite
+
+## Drift of a model against its own stored history: CUSUM on score and latency, per-word flips ##
+# python drift.py v2 [recent_runs]
+
+SLACK = 0.5  # CUSUM allowance, in standard deviations of the history
+THRESHOLD = 5.0  # CUSUM alarm level, in standard deviations of the history
+MIN_HISTORY = 5  # Runs needed before a model or a word is monitored
+MIN_SCORE_STD = 1.0  # In score units, models that always score the same still drift
+MIN_LOG_LATENCY_STD = 0.1
+FLIP_AGREEMENT = 0.8  # Only words answered this consistently in the history can flip
+FLIP_P_VALUE = 0.01  # Flips less likely than this under the history are reported
+RECENT_RUNS = 4  # Runs treated as new when checking the stored results offline
+
+
+@dataclass
+class Cusum:
+    # One-sided CUSUM of standardized deviations, direction 1 watches increases, -1 drops
+    mean: float
+    std: float
+    direction: int
+    statistic: float = 0.0
+    observations: int = 0
+    values: List[float] = field(default_factory=list)
+    alarm: Optional[int] = None  # Observation that crossed THRESHOLD
+
+    def update(self, value: float) -> bool:
+        self.observations += 1
+        self.values.append(value)
+        deviation = self.direction * (value - self.mean) / self.std
+        self.statistic = max(0.0, self.statistic + deviation - SLACK)
+        if self.alarm is None and self.statistic > THRESHOLD:
+            self.alarm = self.observations
+            return True
+        return False
+
+    @property
+    def recent_mean(self) -> float:
+        return statistics.fmean(self.values) if self.values else self.mean
+
+
+def binomial_tail(successes: int, trials: int, p: float) -> float:
+    # P(X >= successes) for X ~ Binomial(trials, p)
+    return sum(
+        math.comb(trials, k) * p**k * (1 - p) ** (trials - k)
+        for k in range(successes, trials + 1)
+    )
+
+
+@dataclass
+class DriftMonitor:
+    name: str
+    seen: int  # Runs of the model already taken into account
+    score: Optional[Cusum] = None
+    latency: Optional[Cusum] = None  # On log latencies, they are heavy tailed
+    majorities: Dict[str, Tuple[str, float]] = field(
+        default_factory=dict
+    )  # Word -> (historical majority, chance of another answer)
+    flips: Counter = field(default_factory=Counter)
+    answered: Counter = field(
+        default_factory=Counter
+    )  # New runs that answered each word
+    reported_flips: int = 0  # Flipped words already raised as an alarm
+
+    @classmethod
+    def from_history(
+        cls, model: Model, history: Optional[int] = None
+    ) -> "DriftMonitor":
+        # The first `history` runs (all by default) are the reference
+        history = model.run_count if history is None else history
+        monitor = cls(model.name, history)
+
+        scores = model.scores[:history]
+        if len(scores) >= MIN_HISTORY:
+            monitor.score = Cusum(
+                statistics.fmean(scores),
+                max(statistics.stdev(scores), MIN_SCORE_STD),
+                direction=-1,
+            )
+
+        latencies = [
+            math.log(latency)
+            for i in range(history)
+            if (latency := aligned(model.latencies, model.run_count, i, 0.0)) > 0
+        ]
+        if len(latencies) >= MIN_HISTORY:
+            monitor.latency = Cusum(
+                statistics.fmean(latencies),
+                max(statistics.stdev(latencies), MIN_LOG_LATENCY_STD),
+                direction=1,
+            )
+
+        answers: Dict[str, Counter] = {}
+        for i in range(history):
+            proposition = aligned(model.propositions, model.run_count, i, {})
+            for word, answer in proposition.items():
+                answers.setdefault(word, Counter())[answer] += 1
+        for word, counts in answers.items():
+            total = sum(counts.values())
+            majority, count = counts.most_common(1)[0]
+            if total >= MIN_HISTORY and count / total >= FLIP_AGREEMENT:
+                # Laplace smoothing, a word never answered otherwise can still flip by chance
+                monitor.majorities[word] = (majority, (total - count + 1) / (total + 2))
+        return monitor
+
+    def observe(self, model: Model) -> List[str]:
+        # Runs added since the last call, returns the alarms they raised
+        alarms = []
+        for i in range(self.seen, model.run_count):
+            if self.score and self.score.update(model.scores[i]):
+                alarms.append(
+                    f"score dropped to {self.score.recent_mean:.2f} from {self.score.mean:.2f}"
+                )
+            latency = aligned(model.latencies, model.run_count, i, 0.0)
+            if self.latency and latency > 0 and self.latency.update(math.log(latency)):
+                alarms.append(
+                    f"latency rose to {math.exp(self.latency.recent_mean):.2f}s "
+                    f"from {math.exp(self.latency.mean):.2f}s"
+                )
+            proposition = aligned(model.propositions, model.run_count, i, {})
+            for word, (majority, _) in self.majorities.items():
+                answer = proposition.get(word)
+                if answer is None:
+                    continue
+                self.answered[word] += 1
+                self.flips[word] += answer != majority
+        self.seen = model.run_count
+
+        flipped = self.flipped_words()
+        if len(flipped) > self.reported_flips:
+            self.reported_flips = len(flipped)
+            alarms.append(f"{len(flipped)} word(s) flipped: {format_flips(flipped)}")
+        return alarms
+
+    def flipped_words(self) -> List[Tuple[str, str, int, int]]:
+        # (word, historical majority, flips, new answers), unlikely under the history
+        return [
+            (word, self.majorities[word][0], flips, self.answered[word])
+            for word, flips in self.flips.items()
+            if flips
+            and binomial_tail(flips, self.answered[word], self.majorities[word][1])
+            < FLIP_P_VALUE
+        ]
+
+    @property
+    def drifted(self) -> bool:
+        return bool(
+            (self.score and self.score.alarm)
+            or (self.latency and self.latency.alarm)
+            or self.flipped_words()
+        )
+
+    def describe(self) -> str:
+        parts = []
+        if self.score and self.score.alarm:
+            parts.append(f"score {self.score.mean:.2f} -> {self.score.recent_mean:.2f}")
+        if self.latency and self.latency.alarm:
+            parts.append(
+                f"latency {math.exp(self.latency.mean):.2f}s -> {math.exp(self.latency.recent_mean):.2f}s"
+            )
+        flipped = self.flipped_words()
+        if flipped:
+            parts.append(f"flipped {format_flips(flipped)}")
+        return ", ".join(parts)
+
+
+def format_flips(flipped: List[Tuple[str, str, int, int]]) -> str:
+    return " ".join(
+        f"{word} (not {majority} {flips}/{answered})"
+        for word, majority, flips, answered in flipped
+    )
+
+
+def check_recent(results: Models, recent: int = RECENT_RUNS) -> List[DriftMonitor]:
+    # Offline check: the last `recent` runs of each model against the ones before them
+    monitors = []
+    for model in results.dico.values():
+        if model.run_count <= recent:
+            continue
+        monitor = DriftMonitor.from_history(model, model.run_count - recent)
+        monitor.observe(model)
+        monitors.append(monitor)
+    return monitors
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    names = [arg for arg in sys.argv[1:] if not arg.isdigit()] or DEFAULT_SUITES
+    recent = next((int(arg) for arg in sys.argv[1:] if arg.isdigit()), RECENT_RUNS)
+    for name in names:
+        results = Models(load_suite(name)).parse_results_file()
+        if results is None:
+            continue
+        drifted = [
+            monitor for monitor in check_recent(results, recent) if monitor.drifted
+        ]
+        for monitor in drifted:
+            logging.warning(f"{name} {monitor.name}: drift, {monitor.describe()}")
+        logging.info(
+            f"{name}: {len(drifted)} model(s) drifted over their last {recent} runs."
+        )
@@ -0,0 +1,210 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import logging
+import sys
+
+import numpy as np
+
+from consts import DEFAULT_SUITES
+from data_structure import Model, Models
+from suites import answer_points, load_suite
+
+## Self-consistency and ensemble scores computed from the stored propositions, no new requests ##
+# python ensemble.py v2 [max_k]
+
+
+@dataclass
+class VoteCurve:
+    name: str
+    k: List[int] = field(default_factory=list)  # Runs per majority vote
+    scores: List[float] = field(default_factory=list)
+    votes: List[int] = field(default_factory=list)  # Disjoint votes averaged for each k
+    tokens: List[float] = field(default_factory=list)  # Completion tokens per vote
+    costs: List[float] = field(default_factory=list)  # Credits per vote
+
+
+@dataclass
+class WordConfidence:
+    index: str
+    word: str
+    expected: str
+    majority: str
+    agreement: float  # Share of the runs giving the majority answer
+    entropy: float  # Of the answer distribution, in bits
+    accuracy: float  # Share of the points earned over all runs, in %
+
+
+class Ballots:
+    # Propositions of a suite as an integer matrix (runs x words), -1 for a missing answer
+    def __init__(self, results: Models) -> None:
+        suite = results.suite
+        self.suite = suite
+        self.indexes = list(suite.solution)
+        answers = {
+            answer
+            for model in results.dico.values()
+            for proposition in model.propositions
+            for answer in proposition.values()
+        }
+        self.answers = sorted(answers)
+        codes = {answer: i for i, answer in enumerate(self.answers)}
+        self.codes = {
+            name: np.array(
+                [
+                    [codes.get(proposition.get(index), -1) for index in self.indexes]
+                    for proposition in model.propositions
+                ],
+                dtype=np.int32,
+            ).reshape(-1, len(self.indexes))
+            for name, model in results.dico.items()
+        }
+        # points[word, code], the extra last column scores missing answers (code -1)
+        self.points = np.zeros((len(self.indexes), len(self.answers) + 1))
+        for w, index in enumerate(self.indexes):
+            expected = suite.solution[index]
+            for code, answer in enumerate(self.answers):
+                self.points[w, code] = answer_points(
+                    answer, expected, suite.alternative_points
+                )
+        self.scale = 100 / len(self.indexes) if suite.score_as_percent else 1
+
+    def counts(self, codes: np.ndarray) -> np.ndarray:
+        # (..., voters, words) -> (..., words, answers + 1) votes per answer
+        one_hot = codes[..., None] == np.arange(-1, len(self.answers))
+        counts = one_hot.sum(axis=-3)
+        return np.roll(counts, -1, axis=-1)  # Missing answers go to the last column
+
+    def majority(self, codes: np.ndarray) -> np.ndarray:
+        counts = 2 * self.counts(codes)
+        counts[..., -1] = 0  # A missing answer never wins a vote
+        # Ties go to the answer of the first voter, as a single run would have answered
+        first = np.where(codes[..., 0, :] >= 0, codes[..., 0, :], len(self.answers))
+        np.put_along_axis(
+            counts,
+            first[..., None],
+            np.take_along_axis(counts, first[..., None], -1) + 1,
+            -1,
+        )
+        counts[..., -1] = 0
+        winners = counts.argmax(axis=-1)
+        return np.where(counts.max(axis=-1) > 0, winners, -1)
+
+    def score(self, codes: np.ndarray) -> np.ndarray:
+        # (..., words) -> (...) scores in the unit of the suite
+        points = self.points[np.arange(len(self.indexes)), codes]
+        return points.sum(axis=-1) * self.scale
+
+
+def vote_curve(
+    ballots: Ballots, model: Model, max_k: Optional[int] = None
+) -> VoteCurve:
+    codes = ballots.codes[model.name]
+    curve = VoteCurve(model.name)
+    runs = len(codes)
+    for k in range(1, min(runs, max_k or runs) + 1):
+        votes = runs // k
+        # Disjoint groups of k consecutive runs, each one is a majority vote
+        groups = codes[: votes * k].reshape(votes, k, -1)
+        curve.k.append(k)
+        curve.scores.append(
+            round(float(ballots.score(ballots.majority(groups)).mean()), 2)
+        )
+        curve.votes.append(votes)
+        curve.tokens.append(round(k * model.avg_token_usage, 2))
+        curve.costs.append(k * model.avg_cost)
+    return curve
+
+
+def model_majorities(ballots: Ballots) -> Dict[str, np.ndarray]:
+    # Majority answer of each model over all of its runs
+    return {
+        name: ballots.majority(codes)
+        for name, codes in ballots.codes.items()
+        if len(codes)
+    }
+
+
+def ensemble_curve(
+    ballots: Ballots, results: Models
+) -> List[Tuple[int, float, List[str]]]:
+    # (m, score, members): one vote per model, for the m best models by average score
+    majorities = model_majorities(ballots)
+    ranked = [name for name, *_ in results.get_models_avg_score() if name in majorities]
+    stacked = np.stack([majorities[name] for name in ranked]) if ranked else None
+    curve = []
+    for m in range(1, len(ranked) + 1):
+        score = float(ballots.score(ballots.majority(stacked[:m])))
+        curve.append((m, round(score, 2), ranked[:m]))
+    return curve
+
+
+def word_confidence(
+    ballots: Ballots, names: Optional[List[str]] = None
+) -> List[WordConfidence]:
+    # Pooled over every run of the given models (all by default), least agreed words first
+    pooled = [ballots.codes[name] for name in names or ballots.codes]
+    pooled = [codes for codes in pooled if len(codes)]
+    if not pooled:
+        return []
+    codes = np.concatenate(pooled)
+    counts = ballots.counts(codes)[..., :-1]  # Missing answers are not an answer
+    totals = counts.sum(axis=-1, keepdims=True)
+    shares = np.divide(counts, totals, out=np.zeros(counts.shape), where=totals > 0)
+    logs = np.log2(shares, out=np.zeros(shares.shape), where=shares > 0)
+    entropy = -(shares * logs).sum(axis=-1)
+    majority = ballots.majority(codes)
+    accuracy = ballots.points[np.arange(len(ballots.indexes)), codes].mean(axis=0)
+
+    rows = [
+        WordConfidence(
+            index,
+            ballots.suite.words.get(index, ""),
+            ballots.suite.solution[index],
+            ballots.answers[majority[w]] if majority[w] >= 0 else "",
+            round(float(shares[w].max()), 3),
+            round(float(entropy[w]), 3),
+            round(100 * float(accuracy[w]), 2),
+        )
+        for w, index in enumerate(ballots.indexes)
+    ]
+    return sorted(rows, key=lambda row: row.agreement)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    names = [arg for arg in sys.argv[1:] if not arg.isdigit()] or DEFAULT_SUITES
+    max_k = next((int(arg) for arg in sys.argv[1:] if arg.isdigit()), None)
+    for name in names:
+        results = Models(load_suite(name)).parse_results_file()
+        if results is None:
+            continue
+        ballots = Ballots(results)
+        unit = "%" if results.suite.score_as_percent else f"/{len(ballots.indexes)}"
+
+        print(
+            f"\n{name}: majority vote of k runs (score, completion tokens, credits per vote)"
+        )
+        for model_name, *_ in results.get_models_avg_score():
+            curve = vote_curve(ballots, results.dico[model_name], max_k)
+            if not curve.k:  # Older runs were stored without their propositions
+                continue
+            steps = " | ".join(
+                f"k={k}: {score}{unit} {tokens:.0f} tok {cost:.4f} cr"
+                for k, score, tokens, cost in zip(
+                    curve.k, curve.scores, curve.tokens, curve.costs
+                )
+            )
+            print(f"  {model_name}: {steps}")
+
+        print(
+            f"\n{name}: ensemble of the m best models (one majority answer per model)"
+        )
+        for m, score, members in ensemble_curve(ballots, results):
+            print(f"  m={m}: {score}{unit} (+ {members[-1]})")
+
+        print(f"\n{name}: least agreed words over all runs")
+        for row in word_confidence(ballots)[:10]:
+            print(
+                f"  {row.index}. {row.word} ({row.expected}): majority {row.majority}, "
+                f"agreement {row.agreement}, entropy {row.entropy} bits, accuracy {row.accuracy}%"
+            )
@@ -0,0 +1,614 @@
+import re
+import sys
+import time
+import uuid
+import logging
+
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+import httpx
+import matplotlib.pyplot as plt
+
+from consts import (
+    DEFAULT_SUITES,
+    MODELS,
+    SAMPLES_PER_REQUEST,
+    MAX_RETRIES,
+    RETRY_BACKOFF,
+    PROMPT_CACHING,
+    MAX_RESPONSE_BYTES,
+    REASONING_SWEEP,
+    PROVIDER_PREFERENCES,
+)
+from backends import BACKENDS, BackendStats, backend_for
+from data_structure import Models
+from drift import DriftMonitor
+from suites import load_suite
+from decoding import decode_proposition, loads, message_text, salvage_messages
+from details_store import reasoning_fields
+from report import generate_report
+import asyncio
+
+single_sample_models: Set[str] = set()  # Models that ignore "n" in the request
+# Error messages of providers that refuse several samples per request
+N_REJECTED = re.compile(
+    r"""['"`]n['"`]|\bn\b\s*(?:must|should|is not|=|>)|parameter n\b"""
+    r"|one completion choice|multiple (?:choices|candidates|completions)",
+    re.IGNORECASE,
+)
+backend_stats: Dict[str, BackendStats] = defaultdict(BackendStats)
+# (suite, model) -> runs of this session tested against the ones stored before it
+drift_monitors: Dict[Tuple[str, str], DriftMonitor] = {}
+
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    datefmt="%H:%M:%S",
+    handlers=[logging.StreamHandler(sys.stdout)],
+)
+
+
+def variant_name(model_name: str, level: Optional[Union[str, int]]) -> str:
+    # Each reasoning level of a sweep is scored as its own model
+    return model_name if level is None else f"{model_name}@{level}"
+
+
+def _cached_tokens(usage: Dict[str, Any]) -> int:
+    details = usage.get("prompt_tokens_details") or {}
+    return int(
+        details.get("cached_tokens") or usage.get("cache_read_input_tokens") or 0
+    )
+
+
+def split_usage(
+    usage: Dict[str, Any], messages: List[Dict[str, Any]]
+) -> List[Dict[str, Union[int, float]]]:
+    # usage only reports the sum over all choices: completion tokens are shared by
+    # output length, the prompt was only sent once and is shared evenly
+    if not messages:
+        return []
+    lengths = [
+        len(message_text(message)) + len(message.get("reasoning") or "")
+        for message in messages
+    ]
+    weight = sum(lengths)
+    if weight == 0:
+        lengths = [1] * len(messages)
+        weight = len(messages)
+
+    def by_length(total: int) -> List[int]:
+        shares = [total * length // weight for length in lengths]
+        shares[lengths.index(max(lengths))] += total - sum(shares)
+        return shares
+
+    def evenly(total: int) -> List[int]:
+        count = len(messages)
+        return [total // count + (i < total % count) for i in range(count)]
+
+    completion_tokens = by_length(int(usage.get("completion_tokens") or 0))
+    prompt_tokens = evenly(int(usage.get("prompt_tokens") or 0))
+    # The cost follows each choice's share of all the tokens
+    tokens = [
+        completion + prompt
+        for completion, prompt in zip(completion_tokens, prompt_tokens)
+    ]
+    total_tokens = sum(tokens)
+    cost = float(usage.get("cost") or 0)
+    return [
+        {
+            "completion_tokens": completion,
+            "prompt_tokens": prompt,
+            "cached_tokens": cached,
+            "cost": (
+                cost * share / total_tokens if total_tokens else cost / len(messages)
+            ),
+        }
+        for completion, prompt, cached, share in zip(
+            completion_tokens, prompt_tokens, evenly(_cached_tokens(usage)), tokens
+        )
+    ]
+
+
+def retry_delay(response: httpx.Response, attempt: int) -> float:
+    # Retry-After in seconds when the provider sends it, exponential backoff otherwise
+    retry_after = response.headers.get("Retry-After", "")
+    if retry_after.isdigit():
+        return float(retry_after)
+    return RETRY_BACKOFF * 2**attempt
+
+
+async def read_capped(response: httpx.Response, limit: int) -> Tuple[bytes, bool]:
+    # Stop reading once the body is over the limit, the prefix is kept for salvaging
+    body = bytearray()
+    async for chunk in response.aiter_bytes():
+        body += chunk
+        if len(body) > limit:
+            return bytes(body[:limit]), True
+    return bytes(body), False
+
+
+async def query_models(
+    suites: List[Models],
+    model_names: List[str] = MODELS,
+    samples: int = 1,
+) -> None:
+    # All suites share the client (connection pool) and the backend semaphores
+    for results in suites:
+        if not results.parsed_file:
+            results.parse_results_file()
+
+    response_format = {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "pitchbench_response",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "details": {"type": "string"},
+                    "proposition": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "word_num": {"type": "string"},
+                                "answer": {"type": "string"},
+                            },
+                            "required": ["word_num", "answer"],
+                            "additionalProperties": False,
+                        },
+                    },
+                },
+                "required": ["details", "proposition"],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+    semaphores = {
+        name: asyncio.Semaphore(backend.max_concurrency)
+        for name, backend in BACKENDS.items()
+    }
+
+    async with httpx.AsyncClient(timeout=60) as client:
+
+        async def request_choices(
+            prompt: str,
+            model_name: str,
+            samples: int,
+            level: Optional[Union[str, int]] = None,
+        ) -> Optional[Tuple[List[Tuple[Dict[str, Any], Dict[str, Any]]], bool]]:
+            # (message, usage) of each choice and whether the body was truncated
+            backend = backend_for(model_name)
+            content = prompt
+            if PROMPT_CACHING and backend.cache_control:
+                # The prompt of a suite is the same for every run and model
+                content = [
+                    {
+                        "type": "text",
+                        "text": prompt,
+                        "cache_control": {"type": "ephemeral"},
+                    }
+                ]
+            payload = {
+                "model": backend.request_model(model_name),
+                "messages": [{"role": "user", "content": content}],
+            }
+            if backend.structured_output == "json_schema":
+                payload["response_format"] = response_format
+            elif backend.structured_output == "json_object":
+                payload["response_format"] = {"type": "json_object"}
+            if backend.usage_accounting:
+                payload["usage"] = {"include": True}  # Cost and cached tokens
+            if samples > 1:
+                payload["n"] = samples
+            if level is not None:
+                payload.update(backend.reasoning_params(level))
+            if backend.provider_routing and model_name in PROVIDER_PREFERENCES:
+                payload["provider"] = PROVIDER_PREFERENCES[model_name]
+
+            for attempt in range(MAX_RETRIES + 1):
+                if attempt:
+                    await asyncio.sleep(delay)
+                async with semaphores[backend.name]:
+                    start = time.perf_counter()
+                    try:
+                        async with client.stream(
+                            "POST",
+                            backend.url,
+                            headers=backend.headers(),
+                            json=payload,
+                            timeout=backend.timeout,
+                        ) as response:
+                            if response.is_error:
+                                await response.aread()  # The message tells why
+                            response.raise_for_status()
+                            body, truncated = await read_capped(
+                                response, MAX_RESPONSE_BYTES
+                            )
+                        latency = time.perf_counter() - start
+                        break
+                    except httpx.HTTPStatusError as exc:
+                        backend_stats[backend.name].record(start, None)
+                        status = exc.response.status_code
+                        if status == 429 and attempt < MAX_RETRIES:
+                            delay = retry_delay(exc.response, attempt)
+                            logging.warning(
+                                f"{backend.name} throttled {model_name}, "
+                                f"retrying in {delay:.0f}s."
+                            )
+                            continue
+                        if (
+                            samples > 1
+                            and status == 400
+                            and N_REJECTED.search(exc.response.text)
+                        ):
+                            single_sample_models.add(model_name)
+                        logging.error(
+                            f"Could not call {backend.name} for {model_name}: {exc}"
+                        )
+                        return None
+                    except httpx.TimeoutException as exc:
+                        backend_stats[backend.name].record(start, None)
+                        if attempt < MAX_RETRIES:
+                            delay = RETRY_BACKOFF * 2**attempt
+                            logging.warning(
+                                f"{backend.name} timed out for {model_name}, "
+                                f"retrying in {delay:.0f}s."
+                            )
+                            continue
+                        logging.error(
+                            f"Could not call {backend.name} for {model_name}: {exc!r}"
+                        )
+                        return None
+                    except httpx.HTTPError as exc:
+                        backend_stats[backend.name].record(start, None)
+                        logging.error(
+                            f"Could not call {backend.name} for {model_name}: {exc}"
+                        )
+                        return None
+
+            try:
+                if truncated:
+                    # The envelope is cut, the answers read so far are still paid for
+                    payload_json = {}
+                    messages = salvage_messages(body)
+                    logging.warning(
+                        f"{model_name}: Response larger than {MAX_RESPONSE_BYTES} "
+                        f"bytes, truncated, {len(messages)} choice(s) salvaged."
+                    )
+                    # usage comes after the choices and is lost: unknown, not free
+                    usages = [
+                        dict.fromkeys(
+                            (
+                                "completion_tokens",
+                                "prompt_tokens",
+                                "cached_tokens",
+                                "cost",
+                            )
+                        )
+                        for _ in messages
+                    ]
+                else:
+                    payload_json = loads(body)
+                    messages = [choice["message"] for choice in payload_json["choices"]]
+                    usages = split_usage(payload_json.get("usage") or {}, messages)
+                # Tokens/s counts the latency once per request, not once per choice
+                request_id = payload_json.get("id") or uuid.uuid4().hex
+                for choice_usage in usages:  # Choices come back together
+                    choice_usage["latency"] = latency
+                    choice_usage["request_id"] = request_id
+                    # Upstream provider of the request, OpenRouter only
+                    choice_usage["provider"] = payload_json.get("provider")
+            except (TypeError, KeyError, ValueError) as e:
+                backend_stats[backend.name].record(start, None)
+                logging.error(f"{model_name}: Unexpected response body: {e}")
+                return None
+
+            backend_stats[backend.name].record(
+                start,
+                sum(choice_usage["completion_tokens"] or 0 for choice_usage in usages),
+            )
+            return list(zip(messages, usages)), truncated
+
+        def score_choice(
+            results: Models,
+            model_name: str,
+            message: Dict[str, Any],
+            usage: Dict[str, Any],
+        ) -> None:
+            suite = results.suite
+            # Array is supported by Sonnet 4.5 and GPT 5.1, but not object (dict) directly
+            decoded = decode_proposition(message_text(message))
+            proposition = decoded.proposition
+            if decoded.mode == "salvaged":
+                logging.warning(
+                    f"{suite.name} {model_name}: Malformed response, salvaged "
+                    f"{decoded.recovered} answers ({decoded.dropped} dropped)."
+                )
+
+            if len(proposition) == 0:
+                logging.warning(
+                    f"The model did not answer: {model_name} ({suite.name})."
+                )
+                return
+
+            unknown = [a for a in proposition.values() if not suite.is_label(a)]
+            if unknown:
+                logging.warning(
+                    f"{suite.name} {model_name}: "
+                    f"Answers outside of the label set: {unknown}"
+                )
+
+            # Keep the reasoning out of the results, Model.get_details reads it back
+            details = {"details": decoded.details, **reasoning_fields(message)}
+            details_ref = (
+                results.details.put(details) if any(details.values()) else None
+            )
+
+            logging.info(f"Proposition from {model_name} got ({suite.name}).")
+            model = results.get_model(model_name)
+            monitor = drift_monitors.get((suite.name, model_name))
+            if monitor is None:
+                monitor = DriftMonitor.from_history(model)
+                drift_monitors[(suite.name, model_name)] = monitor
+            model.add_score(
+                proposition,
+                usage["completion_tokens"],
+                recovery=decoded.to_record(),
+                prompt_tokens=usage["prompt_tokens"],
+                cached_tokens=usage["cached_tokens"],
+                cost=usage["cost"],
+                latency=usage["latency"],
+                details_ref=details_ref,
+                provider=usage["provider"],
+                request_id=usage["request_id"],
+            )
+            for alarm in monitor.observe(model):
+                logging.warning(f"{suite.name} {model_name}: Drift, {alarm}.")
+
+        async def fetch_model(
+            results: Models, model_name: str, level: Optional[Union[str, int]] = None
+        ) -> None:
+            prompt = results.suite.prompt
+            variant = variant_name(model_name, level)
+            if (
+                level is not None
+                and backend_for(model_name).reasoning_params(level) is None
+            ):
+                logging.warning(
+                    f"{backend_for(model_name).name} can't set reasoning level "
+                    f"{level!r}, skipping {variant}."
+                )
+                return
+            if variant in results.dico:
+                logging.info(f"Existing proposition for {variant} in json file.")
+            logging.info(
+                f"Requesting {samples} solution(s) to {variant} ({results.suite.name})."
+            )
+
+            choices = []
+            if (
+                samples > 1
+                and backend_for(model_name).multi_sample
+                and model_name not in single_sample_models
+            ):
+                response = await request_choices(prompt, model_name, samples, level)
+                if response is None and model_name not in single_sample_models:
+                    return  # Failed even after retries, n requests would only add load
+                if response is not None:
+                    choices, truncated = response
+                    # A truncated body lost choices, the model did not ignore "n"
+                    if len(choices) < samples and not truncated:
+                        logging.info(
+                            f"{model_name}: {len(choices)}/{samples} samples in one "
+                            "request, falling back to separate requests."
+                        )
+                        single_sample_models.add(model_name)
+
+            missing = samples - len(choices)
+            if missing > 0:
+                for result in await asyncio.gather(
+                    *(
+                        request_choices(prompt, model_name, 1, level)
+                        for _ in range(missing)
+                    )
+                ):
+                    if result is not None:
+                        choices.extend(result[0])
+
+            for message, usage in choices:
+                score_choice(results, variant, message, usage)
+
+        levels = REASONING_SWEEP or [None]
+        await asyncio.gather(
+            *(
+                fetch_model(results, name, level)
+                for results in suites
+                for name in model_names
+                for level in levels
+            )
+        )
+
+    for results in suites:
+        logging.info(f"Saving the results in {results.suite.results_file}.")
+        results.save_to_file()
+
+
+def log_summary(results: Models) -> None:
+    unit = "%" if results.suite.score_as_percent else f"/{len(results.suite.solution)}"
+    for name, hit_rate, avg_cost, run_count in results.get_models_cache_stats():
+        model = results.dico[name]
+        _, p90, p99 = model.token_quantiles
+        logging.info(
+            f"{results.suite.name} {name} (n={run_count}): {model.avg_score}{unit} | "
+            f"{model.avg_token_usage} completion tokens "
+            f"(p90 {p90:.0f}, p99 {p99:.0f}) | cache hit rate {hit_rate}% | "
+            f"{avg_cost:.6f} credits/run"
+        )
+        monitor = drift_monitors.get((results.suite.name, name))
+        if monitor is not None and monitor.drifted:
+            logging.warning(
+                f"{results.suite.name} {name}: DRIFT this session, {monitor.describe()}"
+            )
+
+
+def log_provider_stats(results: Models) -> None:
+    stats = results.get_provider_stats()
+    for name, provider, runs, score, latency, tokens_per_second in stats:
+        if provider is None:  # Runs recorded before providers were, or local ones
+            continue
+        logging.info(
+            f"{results.suite.name} {name} via {provider} (n={runs}): {score} | "
+            f"{latency:.2f}s | {tokens_per_second:.1f} tokens/s"
+        )
+
+
+def log_backend_stats() -> None:
+    for name, stats in backend_stats.items():
+        where = "local" if BACKENDS[name].local else "remote"
+        logging.info(
+            f"Backend {name} ({where}, concurrency {BACKENDS[name].max_concurrency}): "
+            f"{stats.requests} requests, {stats.failures} failed, "
+            f"{stats.completion_tokens} completion tokens in {stats.wall_time:.1f}s "
+            f"({stats.tokens_per_second:.1f} tokens/s)"
+        )
+
+
+def plot_results(results: Models) -> None:
+    suite = results.suite
+    score_data = results.get_models_avg_score()
+    token_data = results.get_models_avg_tokens()
+
+    score_data.sort(key=lambda x: x[1], reverse=True)
+    names_score = [f"{d[0]} (n={d[3]})" for d in score_data]
+    values_score = [(d[1]) for d in score_data]
+    cis_score = [(d[2]) for d in score_data]
+    names_token = [f"{d[0]} (n={d[2]})" for d in token_data]
+    values_token = [d[1] for d in token_data]
+    quantiles_token = [d[3:] for d in token_data]  # p50, p90, p99
+
+    def plot_metric(
+        labels: List[str],
+        values: List[float],
+        title: str,
+        color: str,
+        xerr: List[float] = None,
+        suffix: str = "",
+        xlim: Optional[int] = None,
+        quantiles: Optional[List[Tuple[float, float, float]]] = None,
+    ) -> None:
+        if not any(values):
+            logging.warning(f"No non-zero {title.lower()}.")
+            return
+
+        y_positions = list(range(len(labels)))
+        fig, ax = plt.subplots(
+            figsize=(10, max(2, 0.6 * len(labels))), facecolor="black"
+        )
+        ax.set_facecolor("black")
+
+        bars = ax.barh(
+            y_positions,
+            values,
+            xerr=xerr,
+            color=color,
+            edgecolor="#1f2933",
+            capsize=5 if xerr else 0,
+            error_kw={"ecolor": "white"},
+        )
+
+        ax.invert_yaxis()
+        ax.set_yticks(y_positions)
+        ax.set_yticklabels(labels, color="white")
+        ax.spines[:].set_color("white")
+        ax.tick_params(colors="white")
+        ax.set_xlabel("Value", color="white")
+        ax.set_title(title, color="white", pad=15)
+
+        if quantiles:
+            # p50, p90 and p99 as ticks over each bar
+            for marker, points in zip(("|", "x", "d"), zip(*quantiles)):
+                ax.scatter(points, y_positions, marker=marker, color="white", zorder=3)
+            ax.legend(
+                ["p50", "p90", "p99"],
+                labelcolor="white",
+                facecolor="black",
+                edgecolor="white",
+                loc="lower right",
+            )
+
+        max_val = max(values)
+        if xerr:
+            max_val += max(xerr)
+        if quantiles:
+            max_val = max(max_val, *(q[-1] for q in quantiles))
+
+        margin = max(1, int(0.05 * max_val))
+        if xlim:
+            ax.set_xlim(0, xlim + margin)
+        else:
+            ax.set_xlim(0, max_val + margin)
+
+        for i, bar in enumerate(bars):
+            width = bar.get_width()
+            label_text = f"{width:.2f}{suffix}"
+
+            text_x = width + margin * 0.02 + (xerr[i] + 0.3 if xerr else 0)
+            if quantiles:
+                text_x = max(text_x, quantiles[i][-1] + margin * 0.3)
+
+            ax.text(
+                text_x,
+                bar.get_y() + bar.get_height() / 2,
+                label_text,
+                va="center",
+                ha="left",
+                color="white",
+            )
+
+        plt.tight_layout()
+        plt.show()
+
+    plot_metric(
+        names_score,
+        values_score,
+        f"{suite.name}: {suite.score_title}",
+        "#4ade80",
+        xerr=cis_score,
+        suffix="%" if suite.score_as_percent else "",
+        xlim=100 if suite.score_as_percent else len(suite.solution),
+    )
+    plot_metric(
+        names_token,
+        values_token,
+        f"{suite.name}: Token usage (bars: average)",
+        "#60a5fa",
+        quantiles=quantiles_token,
+    )
+
+
+async def main() -> None:
+    # python main.py v1 v2
+    suites = [Models(load_suite(name)) for name in sys.argv[1:] or DEFAULT_SUITES]
+
+    c = int(input("Number of runs: "))
+    remaining = c
+    while remaining > 0:
+        samples = min(remaining, SAMPLES_PER_REQUEST)
+        await query_models(suites, samples=samples)
+        remaining -= samples
+
+    log_backend_stats()
+    for results in suites:
+        if not results.parsed_file:
+            results.parse_results_file()
+        log_summary(results)
+        log_provider_stats(results)
+        generate_report(results)
+        plot_results(results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+import json
+import random
+import re
+import sys
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+## Local stand-in for the OpenRouter chat completions endpoint, to try the harness for free ##
+# python mock_server.py [port]
+# OPEN_ROUTER_BASE_URL=http://127.0.0.1:8000/api/v1 python main.py v1 v2
+
+LABELS = ["H", "A", "N", "O"]
+PROVIDERS = ["MockCloud", "MockFast"]  # Upstream providers a request is routed to
+PRICES = {"prompt": 1e-6, "cached": 1e-7, "completion": 4e-6}  # Per token
+seen_prompts = set()
+# Model names ending like these misbehave as some providers do, to try the fallbacks:
+#   /no-n: 400 when "n" > 1, /one-choice: a single choice whatever "n",
+#   /throttled: 429 with Retry-After on every other request, /invalid: 400
+throttled_requests = Counter()
+
+
+def prompt_text(messages: List[Dict[str, Any]]) -> tuple[str, bool]:
+    text, cacheable = "", False
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list):
+            for part in content:
+                text += part.get("text", "")
+                cacheable = cacheable or "cache_control" in part
+        else:
+            text += content or ""
+    return text, cacheable
+
+
+def failure(request: Dict[str, Any]) -> Optional[Tuple[int, str]]:
+    model = request.get("model") or ""
+    if model.endswith("/no-n") and int(request.get("n") or 1) > 1:
+        return 400, "Provider returned error: 'n' must be 1 for this model"
+    if model.endswith("/invalid"):
+        return 400, f"{model} is not a valid model ID"
+    if model.endswith("/throttled"):
+        throttled_requests[model] += 1
+        if throttled_requests[model] % 2:
+            return 429, "Rate limit exceeded, retry shortly"
+    return None
+
+
+def completion(request: Dict[str, Any]) -> Dict[str, Any]:
+    text, cacheable = prompt_text(request.get("messages", []))
+    word_count = len(re.findall(r"^\d+\. ", text, flags=re.MULTILINE))
+    n = int(request.get("n") or 1)
+    if (request.get("model") or "").endswith("/one-choice"):
+        n = 1
+
+    prompt_tokens = len(text) // 2
+    key = (request.get("model"), text)  # Caches are per model
+    cached_tokens = prompt_tokens if cacheable and key in seen_prompts else 0
+    seen_prompts.add(key)
+
+    choices = []
+    completion_tokens = 0
+    for index in range(n):
+        content = json.dumps(
+            {
+                "details": "Mock answer.",
+                "proposition": [
+                    {"word_num": str(i), "answer": random.choice(LABELS)}
+                    for i in range(1, word_count + 1)
+                ],
+            }
+        )
+        completion_tokens += len(content) // 3
+        choices.append(
+            {
+                "index": index,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        )
+
+    cost = (
+        (prompt_tokens - cached_tokens) * PRICES["prompt"]
+        + cached_tokens * PRICES["cached"]
+        + completion_tokens * PRICES["completion"]
+    )
+    # Honour the first provider of "order" like OpenRouter, otherwise route at random
+    order = (request.get("provider") or {}).get("order")
+    return {
+        "id": f"mock-{time.time_ns()}",
+        "provider": order[0] if order else random.choice(PROVIDERS),
+        "model": request.get("model"),
+        "choices": choices,
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            "cost": cost,
+        },
+    }
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length))
+        except json.JSONDecodeError:
+            self.send_error(400, "Invalid JSON")
+            return
+
+        error = failure(request)
+        if error:  # Error body in the format of OpenRouter
+            status, message = error
+            body = json.dumps({"error": {"code": status, "message": message}})
+            self.send_response(status)
+            if status == 429:
+                self.send_header("Retry-After", "0")
+        else:
+            body = json.dumps(completion(request))
+            self.send_response(200)
+        body = body.encode("utf-8")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    print(f"Mock endpoint on http://127.0.0.1:{port}/api/v1/chat/completions")
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
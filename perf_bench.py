@@ -0,0 +1,245 @@
+import argparse
+import gc
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import matplotlib
+
+matplotlib.use("Agg")  # Never open windows while timing plot_results
+import matplotlib.pyplot as plt
+
+from data_structure import Models
+from suites import Suite
+import main
+
+## Micro-benchmarks of the harness itself on synthetic result stores ##
+# python perf_bench.py --scale small
+# python perf_bench.py --scale large --update-baseline
+
+SCALES: Dict[str, Tuple[int, int, int]] = {  # models, runs per model, words
+    "small": (20, 200, 50),
+    "medium": (100, 1000, 50),
+    "large": (200, 5000, 50),
+}
+BASELINE_FILE = Path(__file__).parent / "perf_baseline.json"
+LABELS = ["H", "A", "N", "O"]
+NOISE = {
+    "seconds": 0.05,
+    "peak_mb": 1.0,
+}  # Differences below this are never regressions
+
+
+def synthetic_store(
+    path: Path, model_count: int, run_count: int, word_count: int, seed: int = 0
+) -> None:
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for m in range(model_count):
+            propositions = [
+                {str(w): rng.choice(LABELS) for w in range(1, word_count + 1)}
+                for _ in range(run_count)
+            ]
+            values = {
+                "scores": [
+                    rng.randint(0, word_count) * 100 / word_count
+                    for _ in range(run_count)
+                ],
+                "completions_tokens": [
+                    rng.randint(200, 20000) for _ in range(run_count)
+                ],
+                "propositions": propositions,
+                "recoveries": [
+                    {"mode": "strict", "recovered": word_count, "dropped": 0}
+                ]
+                * run_count,
+                "prompt_tokens": [900] * run_count,
+                "cached_tokens": [rng.choice((0, 900)) for _ in range(run_count)],
+                "costs": [rng.random() / 100 for _ in range(run_count)],
+                "timestamps": ["2026-01-01T00:00:00+00:00"] * run_count,
+                "run_count": run_count,
+            }
+            f.write(("," if m else "") + json.dumps(f"synthetic/model-{m}") + ":")
+            json.dump(values, f)
+        f.write("}")
+
+
+def calibrate(repeat: int) -> float:
+    # Fixed workload timed on this machine, stage times are compared relative to it
+    best = float("inf")
+    rng = random.Random(0)
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = [{str(i): rng.random() for i in range(50)} for _ in range(4000)]
+        json.loads(json.dumps(rows))
+        sorted(value for row in rows for value in row.values())
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(
+    stage: Callable[[], None], setup: Callable[[], None], repeat: int
+) -> Tuple[float, float]:
+    # Best wall time over untraced repeats, then one traced run for the peak memory
+    best = float("inf")
+    for _ in range(repeat):
+        setup()
+        gc.collect()
+        start = time.perf_counter()
+        stage()
+        best = min(best, time.perf_counter() - start)
+
+    setup()
+    gc.collect()
+    tracemalloc.start()
+    stage()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 2**20
+
+
+def run(scale: str, repeat: int, appends: int) -> Dict[str, Dict[str, float]]:
+    model_count, run_count, word_count = SCALES[scale]
+    rng = random.Random(1)
+    solution = {str(w): rng.choice(LABELS) for w in range(1, word_count + 1)}
+    results: Dict[str, Dict[str, float]] = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = Path(tmp) / "results.json"
+        output = Path(tmp) / "saved.json"
+        print(
+            f"Generating {model_count} models x {run_count} runs x {word_count} words..."
+        )
+        synthetic_store(store, model_count, run_count, word_count)
+        suite = Suite(
+            name="bench",
+            prompt="",
+            solution=solution,
+            words={w: w for w in solution},
+            labels=LABELS,
+            alternative_points=1,
+            score_as_percent=True,
+            random_score=None,
+            results_file=store,
+            results_db=None,
+            details_dir=Path(tmp) / "details",
+            report_file=Path(tmp) / "report.html",
+        )
+        models = Models(suite)
+
+        def reset() -> None:
+            models.dico.clear()
+
+        def load() -> None:
+            models.parse_results_file(store)
+
+        def reload() -> None:
+            # append grows the store, every stage after it starts from the generated one
+            reset()
+            load()
+
+        def score() -> None:
+            for model in models.dico.values():
+                model.update_variables()
+
+        def append() -> None:
+            for model in models.dico.values():
+                for _ in range(appends):
+                    proposition = {w: rng.choice(LABELS) for w in solution}
+                    model.add_score(proposition, 1000)
+
+        def save() -> None:
+            models.save_to_file(output)
+
+        def plot() -> None:
+            main.plot_results(models)
+            for number in plt.get_fignums():  # Agg only renders on draw
+                plt.figure(number).canvas.draw()
+            plt.close("all")
+
+        stages: List[Tuple[str, Callable[[], None], Callable[[], None]]] = [
+            ("load", load, reset),
+            ("score", score, lambda: None),
+            ("append", append, reload),
+            ("save", save, reload),
+            ("plot", plot, reload),
+        ]
+        for name, stage, setup in stages:
+            seconds, peak_mb = measure(stage, setup, repeat)
+            results[name] = {"seconds": round(seconds, 4), "peak_mb": round(peak_mb, 2)}
+            print(f"{name:>8}: {seconds:9.4f} s {peak_mb:10.2f} MiB peak")
+
+    calibration = calibrate(repeat)
+    results["calibration"] = {"seconds": round(calibration, 4)}
+    print(f"{'calibration':>8}: {calibration:9.4f} s")
+    return results
+
+
+def compare(
+    scale: str, results: Dict[str, Dict[str, float]], tolerance: float
+) -> List[str]:
+    if not BASELINE_FILE.exists():
+        return []
+    baseline = json.loads(BASELINE_FILE.read_text(encoding="utf-8")).get(scale, {})
+    # Times are scaled by the calibration workload to the speed of the baseline machine
+    reference_calibration = baseline.get("calibration", {}).get("seconds")
+    speed = (
+        reference_calibration / results["calibration"]["seconds"]
+        if reference_calibration
+        else None
+    )
+    regressions = []
+    for stage, values in results.items():
+        if stage == "calibration":
+            continue
+        for metric, value in values.items():
+            reference = baseline.get(stage, {}).get(metric)
+            if reference is None:
+                continue
+            if metric == "seconds":
+                if speed is None:  # Baseline from an older version, no calibration
+                    continue
+                value = round(value * speed, 4)
+            if value > reference * tolerance and value - reference > NOISE[metric]:
+                regressions.append(
+                    f"{stage} {metric}: {value} vs {reference} (+{value - reference:.2f})"
+                )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the harness hot paths.")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--appends", type=int, default=10, help="Runs appended per model"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=1.3, help="Allowed slowdown ratio"
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)  # add_score warnings
+    results = run(args.scale, args.repeat, args.appends)
+
+    if args.update_baseline:
+        baseline = {}
+        if BASELINE_FILE.exists():
+            baseline = json.loads(BASELINE_FILE.read_text(encoding="utf-8"))
+        baseline[args.scale] = results
+        BASELINE_FILE.write_text(json.dumps(baseline, indent=4), encoding="utf-8")
+        print(f"Baseline saved in {BASELINE_FILE}.")
+        sys.exit(0)
+
+    regressions = compare(args.scale, results, args.tolerance)
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    sys.exit(1 if regressions else 0)
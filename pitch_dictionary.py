@@ -0,0 +1,244 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import argparse
+import json
+import logging
+import sqlite3
+import zipfile
+
+from suites import SUITES, load_suite
+
+## Pitch accents of local Yomitan dictionaries (term_meta_bank_*.json), indexed in SQLite ##
+# python pitch_dictionary.py import ~/Downloads/kanjium_pitch_accents.zip
+# python pitch_dictionary.py solution --suite v2
+# python pitch_dictionary.py solution --numbered 青い 博物館 ちょっと
+
+PITCH_DB = Path(__file__).parent / "pitch_accents.db"
+# Small kana share a mora with the kana before them
+SMALL_KANA = set("ゃゅょぁぃぅぇぉゎャュョァィゥェォヮ")
+LABEL_ORDER = "HANO"  # Order of the options of an alternative, N by downstep position
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pitches (
+    term TEXT NOT NULL,
+    reading TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    PRIMARY KEY (term, reading, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS pitches_reading ON pitches(reading);
+"""
+
+
+def to_hiragana(text: str) -> str:
+    return "".join(
+        chr(ord(char) - 0x60) if "ァ" <= char <= "ヶ" else char for char in text
+    )
+
+
+def is_kana(text: str) -> bool:
+    return all(
+        "ぁ" <= char <= "ゖ" or "ァ" <= char <= "ヺ" or char == "ー" for char in text
+    )
+
+
+def mora_count(reading: str) -> int:
+    return sum(char not in SMALL_KANA for char in reading)
+
+
+def pattern_position(pattern: str) -> int:
+    # "LHHL" style patterns (a particle mora may follow): the downstep follows the last high mora
+    pattern = pattern.upper()
+    if "H" not in pattern:
+        return 0
+    last_high = pattern.rindex("H") + 1
+    return 0 if last_high == len(pattern) else last_high  # High up to the end: heiban
+
+
+def accent_label(position: int, moras: int, numbered: bool = False) -> str:
+    # Downstep after mora `position`, reduced to the labels of the prompts
+    if position == 0:
+        return "H"
+    if position == 1:
+        return "A"
+    if position >= moras:
+        return "O"
+    return f"N{position}" if numbered else "N"
+
+
+def alternatives(labels: List[str]) -> Optional[str]:
+    # ["O", "N3", "A", "N2", "A"] -> "[A;N2;N3;O]", the same for any dictionary order
+    unique = sorted(
+        set(labels),
+        key=lambda label: (LABEL_ORDER.index(label[0]), int(label[1:] or 0)),
+    )
+    if not unique:
+        return None
+    return unique[0] if len(unique) == 1 else f"[{';'.join(unique)}]"
+
+
+def bank_entries(source: Path) -> Iterator[Tuple[str, str, int]]:
+    # (term, reading, position) of the pitch entries of a dictionary zip, folder or bank file
+    if source.is_dir():
+        for path in sorted(source.glob("term_meta_bank*.json")):
+            yield from pitch_entries(path.read_bytes())
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for name in sorted(archive.namelist()):
+                if Path(name).name.startswith("term_meta_bank"):
+                    yield from pitch_entries(archive.read(name))
+    elif source.name.startswith("term_meta_bank"):
+        yield from pitch_entries(source.read_bytes())
+
+
+def pitch_entries(bank: bytes) -> Iterator[Tuple[str, str, int]]:
+    for entry in json.loads(bank):
+        if len(entry) < 3 or entry[1] != "pitch":
+            continue
+        term, data = entry[0], entry[2]
+        reading = to_hiragana(data.get("reading") or term)
+        for pitch in data.get("pitches", []):
+            position = pitch.get("position")
+            if isinstance(position, str):
+                position = pattern_position(position)
+            if isinstance(position, int):
+                yield term, reading, position
+
+
+@dataclass
+class WordAccent:
+    word: str
+    # "[A;H]" when several accents are valid, None without an entry
+    labels: Optional[str]
+    readings: List[str] = field(default_factory=list)
+
+
+class PitchDictionary:
+    def __init__(self, path: Path = PITCH_DB) -> None:
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def import_banks(self, source: Path) -> int:
+        # Entries of earlier imports keep their rank, the first dictionary wins ties
+        (rank,) = self.connection.execute(
+            "SELECT COALESCE(MAX(rank), 0) FROM pitches"
+        ).fetchone()
+        with self.connection:
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO pitches VALUES (?, ?, ?, ?)",
+                (
+                    (term, reading, position, rank + i)
+                    for i, (term, reading, position) in enumerate(
+                        bank_entries(source), start=1
+                    )
+                ),
+            )
+            imported = self.connection.total_changes - before
+        logging.info(f"Imported {imported} pitch accents from {source}.")
+        return imported
+
+    def lookup(self, word: str, reading: Optional[str] = None) -> List[Tuple[str, int]]:
+        # (reading, position) by written form, kana-only words are also looked up by reading
+        if reading:  # An explicit reading only selects among the entries of the word
+            return self.connection.execute(
+                "SELECT reading, position FROM pitches WHERE term = ? AND reading = ? "
+                "ORDER BY rank",
+                (word, to_hiragana(reading)),
+            ).fetchall()
+        rows = self.connection.execute(
+            "SELECT reading, position FROM pitches WHERE term = ? ORDER BY rank",
+            (word,),
+        ).fetchall()
+        if rows or not is_kana(word):
+            return rows
+
+        rows = self.connection.execute(
+            "SELECT term, reading, position FROM pitches WHERE reading = ? ORDER BY rank",
+            (to_hiragana(word),),
+        ).fetchall()
+        terms = list(dict.fromkeys(term for term, _, _ in rows))
+        if len(terms) > 1:
+            logging.warning(
+                f"{word}: Read as several words ({'/'.join(terms)}), "
+                "their accents are all accepted, write the word in kanji to pick one."
+            )
+        return [(reading, position) for _, reading, position in rows]
+
+    def accent(
+        self, word: str, reading: Optional[str] = None, numbered: bool = False
+    ) -> WordAccent:
+        rows = self.lookup(word, reading)
+        return WordAccent(
+            word,
+            alternatives(
+                [
+                    accent_label(position, mora_count(reading), numbered)
+                    for reading, position in rows
+                ]
+            ),
+            list(dict.fromkeys(reading for reading, _ in rows)),
+        )
+
+    def solution(
+        self,
+        words: Union[List[str], Dict[str, str]],
+        numbered: bool = False,
+    ) -> Tuple[Dict[str, str], List[WordAccent]]:
+        # Solution map in the format of the suites, and the words without a pitch entry
+        if isinstance(words, list):
+            words = {str(i + 1): word for i, word in enumerate(words)}
+        solution, missing = {}, []
+        for index, word in words.items():
+            word, _, reading = word.partition("[")  # "唯[ただ]" selects a reading
+            accent = self.accent(word, reading.rstrip("]") or None, numbered)
+            if accent.labels is None:
+                missing.append(accent)
+                continue
+            solution[index] = accent.labels
+            if len(accent.readings) > 1:
+                logging.warning(
+                    f"{index}. {word}: Several readings ({'/'.join(accent.readings)}), "
+                    f"{accent.labels} covers all of them."
+                )
+        return solution, missing
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Yomitan pitch accent dictionaries.")
+    parser.add_argument("--db", type=Path, default=PITCH_DB)
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="Index a dictionary zip or folder")
+    importer.add_argument("sources", type=Path, nargs="+")
+    solver = commands.add_parser("solution", help="Print a SOLUTION_STRING")
+    solver.add_argument("words", nargs="*", help='Words, "唯[ただ]" for one reading')
+    solver.add_argument("--suite", choices=SUITES, help="Words of a suite's prompt")
+    solver.add_argument("--numbered", action="store_true", help="N<k> as in v1")
+    args = parser.parse_args()
+
+    dictionary = PitchDictionary(args.db)
+    if args.command == "import":
+        for source in args.sources:
+            dictionary.import_banks(source)
+    else:
+        suite = load_suite(args.suite) if args.suite else None
+        words = suite.words if suite else args.words
+        solution, missing = dictionary.solution(words, args.numbered)
+        for accent in missing:
+            logging.warning(f"No pitch accent for {accent.word}.")
+        indexes = list(words) if suite else [str(i + 1) for i in range(len(words))]
+        print(",".join(solution.get(index, "?") for index in indexes))
+        if suite:  # Differences with the hand-written solution
+            for index in indexes:
+                expected = suite.solution.get(index)
+                if expected is not None:  # Hand-written options can be in any order
+                    expected = alternatives(expected.strip("[]").split(";"))
+                if index in solution and solution[index] != expected:
+                    print(f"{index}. {words[index]}: {solution[index]} vs {expected}")
+    dictionary.close()
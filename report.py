@@ -0,0 +1,579 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from html import escape
+from pathlib import Path
+from string import Template
+from typing import Callable, List, Optional, Tuple
+import argparse
+import hashlib
+import json
+import math
+import logging
+
+from consts import DEFAULT_SUITES
+from data_structure import Models
+from drift import RECENT_RUNS, DriftMonitor, check_recent, format_flips
+from suites import Suite, answer_points, load_suite
+
+## Self-contained HTML report (sortable tables + SVG charts) of a results store ##
+
+ROW_HEIGHT = 18  # Pixels per bar, charts grow with the number of models
+LABEL_WIDTH = 340
+BAR_WIDTH = 520
+SCATTER_HEIGHT = 320
+# The page is computed by these modules too (scoring, quantiles, drift thresholds)
+SOURCES = ["report.py", "data_structure.py", "sketch.py", "drift.py", "suites.py"]
+
+
+@dataclass
+class ModelRow:
+    name: str
+    runs: int
+    score: float
+    ci: float
+    tokens: float
+    latency: float
+    tokens_per_second: float
+    cost: float
+    cache_hit_rate: float
+    token_quantiles: List[float]  # p50, p90, p99
+    latency_quantiles: List[float]
+
+
+@dataclass
+class WordRow:
+    index: str
+    word: str
+    expected: str
+    # Of the suite, an answer within alternatives is only partly right
+    alternative_points: float
+    answers: Counter = field(default_factory=Counter)
+    runs: int = 0  # Missing answers score 0, as in Suite.score
+    points: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return sum(self.answers.values())
+
+    @property
+    def accuracy(self) -> float:
+        return 100 * self.points / self.runs if self.runs else 0.0
+
+    @property
+    def top_wrong(self) -> str:
+        for answer, count in self.answers.most_common():
+            if self.answer_points(answer) < 1:
+                return f"{answer} ({count})"
+        return ""
+
+    def answer_points(self, answer: Optional[str]) -> float:
+        return answer_points(answer, self.expected, self.alternative_points)
+
+
+def report_digest(suite: Suite, paths: List[Path]) -> str:
+    # The page changes with the results store, the solution it is scored against and the code
+    digest = hashlib.sha256()
+    digest.update(json.dumps(suite.solution, sort_keys=True).encode("utf-8"))
+    for name in SOURCES:
+        digest.update((Path(__file__).parent / name).read_bytes())
+    for path in paths:
+        if not path.exists():
+            continue
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(2**20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def aggregate(source: Models) -> Tuple[List[ModelRow], List[WordRow]]:
+    # One pass over every run of every model
+    word_rows = {
+        index: WordRow(
+            index,
+            source.suite.words.get(index, ""),
+            expected,
+            source.suite.alternative_points,
+        )
+        for index, expected in source.suite.solution.items()
+    }
+    model_rows = []
+    for name, model in source.dico.items():
+        for proposition in model.propositions:
+            for index, row in word_rows.items():
+                answer = proposition.get(index)
+                row.runs += 1
+                if answer is None:
+                    continue
+                row.answers[answer] += 1
+                row.points += row.answer_points(answer)
+
+        model_rows.append(
+            ModelRow(
+                name,
+                model.run_count,
+                model.avg_score,
+                model.ci_score,
+                model.avg_token_usage,
+                model.avg_latency,
+                model.tokens_per_second(),
+                model.avg_cost,
+                model.cache_hit_rate,
+                model.token_quantiles,
+                model.latency_quantiles,
+            )
+        )
+
+    model_rows.sort(key=lambda row: row.score, reverse=True)
+    return model_rows, list(word_rows.values())
+
+
+def svg_bars(
+    bars: List[Tuple[str, float, float]],
+    color: str,
+    suffix: str = "",
+    max_value: Optional[float] = None,
+    marks: Optional[List[List[float]]] = None,
+) -> str:
+    # bars: (label, value, error), marks: ticks drawn over each bar (p50, p90, p99)
+    if not bars:
+        return ""
+    top = (
+        max_value
+        or max(
+            max(value + error for _, value, error in bars),
+            max((max(row, default=0) for row in marks or []), default=0),
+        )
+        or 1
+    )
+    scale = BAR_WIDTH / top
+    height = ROW_HEIGHT * len(bars) + 10
+    width = LABEL_WIDTH + BAR_WIDTH + 90
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}">'
+    ]
+    for i, (label, value, error) in enumerate(bars):
+        y = 5 + i * ROW_HEIGHT
+        bar = max(value * scale, 0)
+        parts.append(
+            f'<text x="{LABEL_WIDTH - 6}" y="{y + 13}" text-anchor="end">{escape(label)}</text>'
+            f'<rect x="{LABEL_WIDTH}" y="{y + 2}" width="{bar:.1f}" height="{ROW_HEIGHT - 4}" fill="{color}"/>'
+        )
+        if error:
+            x1, x2 = (
+                LABEL_WIDTH + (value - error) * scale,
+                LABEL_WIDTH + (value + error) * scale,
+            )
+            parts.append(
+                f'<line x1="{x1:.1f}" x2="{x2:.1f}" y1="{y + 9}" y2="{y + 9}" stroke="white"/>'
+            )
+        ticks = marks[i] if marks else []
+        for tick in ticks:
+            x = LABEL_WIDTH + tick * scale
+            parts.append(
+                f'<line x1="{x:.1f}" x2="{x:.1f}" y1="{y + 2}" y2="{y + ROW_HEIGHT - 2}" stroke="white"/>'
+            )
+        text_x = LABEL_WIDTH + max([value + error, *ticks]) * scale + 6
+        parts.append(f'<text x="{text_x:.1f}" y="{y + 13}">{value:.2f}{suffix}</text>')
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def pareto_front(
+    rows: List[ModelRow], cost: Callable[[ModelRow], float]
+) -> List[ModelRow]:
+    # Rows no other row beats on both score and cost, cheapest first
+    front: List[ModelRow] = []
+    for row in sorted(rows, key=lambda row: (cost(row), -row.score)):
+        if cost(row) > 0 and (not front or row.score > front[-1].score):
+            front.append(row)
+    return front
+
+
+def cheapest_reaching(
+    rows: List[ModelRow], cost: Callable[[ModelRow], float], target: float
+) -> Optional[ModelRow]:
+    # The front is sorted by cost with rising scores: its first row reaching the target is the cheapest
+    return next((row for row in pareto_front(rows, cost) if row.score >= target), None)
+
+
+def svg_scatter(
+    rows: List[ModelRow],
+    cost: Callable[[ModelRow], float],
+    color: str,
+    max_score: float,
+    unit: str = "",
+) -> str:
+    # Score against cost, the Pareto front is joined and labelled
+    rows = [row for row in rows if cost(row) > 0]
+    if not rows:
+        return ""
+    front = pareto_front(rows, cost)
+    width, height = LABEL_WIDTH + BAR_WIDTH, SCATTER_HEIGHT
+    left, bottom = 50, height - 25
+    top_cost = max(cost(row) for row in rows) * 1.05
+
+    def x(row: ModelRow) -> float:
+        return left + (width - left - 10) * cost(row) / top_cost
+
+    def y(row: ModelRow) -> float:
+        return bottom - (bottom - 10) * row.score / max_score
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}">',
+        f'<line x1="{left}" x2="{width}" y1="{bottom}" y2="{bottom}" stroke="white"/>',
+        f'<line x1="{left}" x2="{left}" y1="0" y2="{bottom}" stroke="white"/>',
+        f'<text x="{left - 6}" y="14" text-anchor="end">{max_score:g}</text>',
+        f'<text x="{left - 6}" y="{bottom}" text-anchor="end">0</text>',
+        f'<text x="{width - 4}" y="{height - 6}" text-anchor="end">{top_cost:.0f}{unit}</text>',
+    ]
+    for row in rows:
+        parts.append(
+            f'<circle cx="{x(row):.1f}" cy="{y(row):.1f}" r="3" fill="#6b7280">'
+            f"<title>{escape(row.name)}</title></circle>"
+        )
+    points = " ".join(f"{x(row):.1f},{y(row):.1f}" for row in front)
+    parts.append(f'<polyline points="{points}" fill="none" stroke="{color}"/>')
+    for row in front:
+        parts.append(
+            f'<circle cx="{x(row):.1f}" cy="{y(row):.1f}" r="4" fill="{color}"/>'
+            f'<text x="{x(row) + 6:.1f}" y="{y(row) + 14:.1f}">{escape(row.name)}</text>'
+        )
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def front_table(rows: List[ModelRow], cost: Callable[[ModelRow], float]) -> str:
+    return html_table(
+        ["Model", "Score", "Tokens", "Latency (s)", "Cost/run"],
+        [
+            [
+                (row.name, row.name),
+                (f"{row.score:.2f}", row.score),
+                (f"{row.tokens:.0f}", row.tokens),
+                (f"{row.latency:.2f}", row.latency),
+                (f"{row.cost:.6f}", row.cost),
+            ]
+            for row in pareto_front(rows, cost)
+        ],
+    )
+
+
+def html_table(headers: List[str], rows: List[List[Tuple[str, object]]]) -> str:
+    # Each cell is (text, sort key), headers are clickable
+    head = "".join(f"<th>{escape(header)}</th>" for header in headers)
+    body = "".join(
+        "<tr>"
+        + "".join(
+            f'<td data-sort="{escape(str(key))}">{escape(text)}</td>'
+            for text, key in row
+        )
+        + "</tr>"
+        for row in rows
+    )
+    return f'<table class="sortable"><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>'
+
+
+PAGE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="pitchbench-digest" content="$digest">
+<title>PitchBench $suite results</title>
+<style>
+body { background: black; color: white; font-family: sans-serif; margin: 2em; }
+svg text { fill: white; font-size: 12px; }
+table { border-collapse: collapse; margin-bottom: 2em; }
+th, td { border: 1px solid #1f2933; padding: 2px 8px; text-align: right; }
+td:first-child, th:first-child { text-align: left; }
+th { cursor: pointer; background: #1f2933; }
+</style>
+</head>
+<body>
+<h1>PitchBench $suite results</h1>
+<p>$model_count models, $run_count runs, $word_count questions.</p>
+<h2>$score_title</h2>
+$score_chart
+<h2>Completion tokens</h2>
+<p>Bars are averages, ticks are p50, p90 and p99.</p>
+$token_chart
+<h2>Latency (s)</h2>
+$latency_chart
+<h2>Score vs completion tokens</h2>
+<p>The line joins the settings no other one beats on both score and tokens, cheapest first.</p>
+$token_front_chart
+$token_front_table
+<h2>Score vs latency</h2>
+$latency_front_chart
+$latency_front_table
+<h2>Models</h2>
+$model_table
+<h2>Drift</h2>
+<p>Last $recent_runs runs of each model against the ones before them.</p>
+$drift_table
+<h2>Providers</h2>
+$provider_table
+<h2>Words</h2>
+$word_table
+<script>
+document.querySelectorAll("table.sortable th").forEach((th, column) => {
+  th.addEventListener("click", () => {
+    const tbody = th.closest("table").tBodies[0];
+    const ascending = th.dataset.order !== "asc";
+    th.dataset.order = ascending ? "asc" : "desc";
+    const key = (row) => row.cells[column].dataset.sort;
+    const rows = Array.from(tbody.rows).sort((a, b) => {
+      const x = key(a), y = key(b);
+      const order = isNaN(x) || isNaN(y) ? x.localeCompare(y) : x - y;
+      return ascending ? order : -order;
+    });
+    tbody.append(...rows);
+  });
+});
+</script>
+</body>
+</html>
+""")
+
+
+def provider_table(
+    stats: List[Tuple[str, Optional[str], int, float, float, float]],
+) -> str:
+    # Runs without a recorded provider are left out
+    rows = [row for row in stats if row[1] is not None]
+    if not rows:
+        return "<p>No provider recorded.</p>"
+    return html_table(
+        ["Model", "Provider", "Runs", "Score", "Latency (s)", "Tokens/s"],
+        [
+            [
+                (name, name),
+                (provider, provider),
+                (str(runs), runs),
+                (f"{score:.2f}", score),
+                (f"{latency:.2f}", latency),
+                (f"{tokens_per_second:.1f}", tokens_per_second),
+            ]
+            for name, provider, runs, score, latency, tokens_per_second in rows
+        ],
+    )
+
+
+def drift_table(monitors: List[DriftMonitor]) -> str:
+    rows = [monitor for monitor in monitors if monitor.drifted]
+    if not rows:
+        return "<p>No drift detected.</p>"
+
+    def alarm(mean: float, recent: float, raised: bool) -> Tuple[str, float]:
+        return (f"{mean:.2f} -> {recent:.2f}" if raised else "", recent - mean)
+
+    return html_table(
+        ["Model", "Score", "Latency (s)", "Flipped words"],
+        [
+            [
+                (monitor.name, monitor.name),
+                (
+                    alarm(
+                        monitor.score.mean,
+                        monitor.score.recent_mean,
+                        bool(monitor.score.alarm),
+                    )
+                    if monitor.score
+                    else ("", 0)
+                ),
+                (
+                    alarm(
+                        math.exp(monitor.latency.mean),
+                        math.exp(monitor.latency.recent_mean),
+                        bool(monitor.latency.alarm),
+                    )
+                    if monitor.latency
+                    else ("", 0)
+                ),
+                (
+                    format_flips(monitor.flipped_words()),
+                    len(monitor.flipped_words()),
+                ),
+            ]
+            for monitor in rows
+        ],
+    )
+
+
+def render(
+    suite: Suite,
+    digest: str,
+    model_rows: List[ModelRow],
+    word_rows: List[WordRow],
+    provider_stats: List[Tuple[str, Optional[str], int, float, float, float]],
+    drift_monitors: List[DriftMonitor],
+) -> str:
+    labels = {row.name: f"{row.name} (n={row.runs})" for row in model_rows}
+    by_tokens = sorted(model_rows, key=lambda row: row.tokens)
+    by_latency = sorted(model_rows, key=lambda row: row.latency)
+    max_score = 100 if suite.score_as_percent else len(suite.solution)
+
+    def tokens(row: ModelRow) -> float:
+        return row.tokens
+
+    def latency(row: ModelRow) -> float:
+        return row.latency
+
+    model_table = html_table(
+        [
+            "Model",
+            "Runs",
+            "Score",
+            "CI (±)",
+            "Tokens",
+            "Tokens p90",
+            "Tokens p99",
+            "Latency (s)",
+            "Latency p90 (s)",
+            "Tokens/s",
+            "Cost/run",
+            "Cache hits (%)",
+        ],
+        [
+            [
+                (row.name, row.name),
+                (str(row.runs), row.runs),
+                (f"{row.score:.2f}", row.score),
+                (f"{row.ci:.2f}", row.ci),
+                (f"{row.tokens:.0f}", row.tokens),
+                (f"{row.token_quantiles[1]:.0f}", row.token_quantiles[1]),
+                (f"{row.token_quantiles[2]:.0f}", row.token_quantiles[2]),
+                (f"{row.latency:.2f}", row.latency),
+                (f"{row.latency_quantiles[1]:.2f}", row.latency_quantiles[1]),
+                (f"{row.tokens_per_second:.1f}", row.tokens_per_second),
+                (f"{row.cost:.6f}", row.cost),
+                (f"{row.cache_hit_rate:.1f}", row.cache_hit_rate),
+            ]
+            for row in model_rows
+        ],
+    )
+    word_table = html_table(
+        ["#", "Word", "Expected", "Success rate (%)", "Answers", "Most common mistake"],
+        [
+            [
+                (row.index, int(row.index)),
+                (row.word, row.word),
+                (row.expected, row.expected),
+                (f"{row.accuracy:.1f}", row.accuracy),
+                (str(row.total), row.total),
+                (row.top_wrong, row.top_wrong),
+            ]
+            for row in word_rows
+        ],
+    )
+    return PAGE.substitute(
+        digest=digest,
+        suite=escape(suite.name),
+        score_title=escape(suite.score_title),
+        model_count=len(model_rows),
+        run_count=sum(row.runs for row in model_rows),
+        word_count=len(word_rows),
+        score_chart=svg_bars(
+            [(labels[row.name], row.score, row.ci) for row in model_rows],
+            "#4ade80",
+            "%" if suite.score_as_percent else "",
+            max_value=max_score,
+        ),
+        token_chart=svg_bars(
+            [(labels[row.name], row.tokens, 0) for row in by_tokens],
+            "#60a5fa",
+            marks=[row.token_quantiles for row in by_tokens],
+        ),
+        latency_chart=svg_bars(
+            [(labels[row.name], row.latency, 0) for row in by_latency if row.latency],
+            "#f59e0b",
+            "s",
+            marks=[row.latency_quantiles for row in by_latency if row.latency],
+        ),
+        token_front_chart=svg_scatter(
+            model_rows, tokens, "#60a5fa", max_score, " tokens"
+        ),
+        token_front_table=front_table(model_rows, tokens),
+        latency_front_chart=svg_scatter(
+            model_rows, latency, "#f59e0b", max_score, " s"
+        ),
+        latency_front_table=front_table(model_rows, latency),
+        model_table=model_table,
+        provider_table=provider_table(provider_stats),
+        recent_runs=RECENT_RUNS,
+        drift_table=drift_table(drift_monitors),
+        word_table=word_table,
+    )
+
+
+def generate_report(source: Models, force: bool = False) -> Path:
+    suite = source.suite
+    output = suite.report_file
+    if suite.results_db is not None:
+        sources = [suite.results_db, Path(f"{suite.results_db}-wal")]
+    else:
+        sources = [suite.results_file]
+    digest = report_digest(suite, sources)
+    if not force and output.exists():
+        with open(output, "r", encoding="utf-8") as f:
+            if f'<meta name="pitchbench-digest" content="{digest}">' in f.read(1024):
+                logging.info(f"{output} is up to date.")
+                return output
+
+    if not source.parsed_file:
+        source.parse_results_file()
+    model_rows, word_rows = aggregate(source)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(
+            render(
+                suite,
+                digest,
+                model_rows,
+                word_rows,
+                source.get_provider_stats(),
+                check_recent(source),
+            )
+        )
+    logging.info(f"Report saved in {output}.")
+    return output
+
+
+if __name__ == "__main__":
+    # python report.py v1 v2 [--target-accuracy 90]
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Build the HTML report of suites.")
+    parser.add_argument("suites", nargs="*", default=DEFAULT_SUITES)
+    parser.add_argument(
+        "--target-accuracy",
+        type=float,
+        help="Score to reach (in the unit of the suite), prints the cheapest and fastest settings",
+    )
+    args = parser.parse_args()
+    for name in args.suites:
+        results = Models(load_suite(name))
+        generate_report(results)
+        if args.target_accuracy is None:
+            continue
+        if not results.parsed_file:
+            results.parse_results_file()
+        model_rows, _ = aggregate(results)
+        for label, front, cost, unit in (
+            ("Cheapest", "token", lambda row: row.tokens, "completion tokens"),
+            ("Fastest", "latency", lambda row: row.latency, "s"),
+        ):
+            if not any(cost(row) > 0 for row in model_rows):
+                continue  # Older results have no latencies
+            row = cheapest_reaching(model_rows, cost, args.target_accuracy)
+            if row is None:  # The fronts differ, the other one may still reach it
+                logging.info(
+                    f"{name}: No setting of the {front} front reaches "
+                    f"{args.target_accuracy:g}."
+                )
+                continue
+            logging.info(
+                f"{name}: {label} setting reaching {args.target_accuracy:g}: {row.name} "
+                f"({row.score:.2f}, {cost(row):.2f} {unit})"
+            )
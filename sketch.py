@@ -0,0 +1,134 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Union
+import math
+
+## Mergeable quantile sketch (merging t-digest), bounded memory per model and metric ##
+
+COMPRESSION = 100  # Roughly the number of centroids kept, more is more precise
+BUFFER_SIZE = 500  # Values added before the buffer is merged into the centroids
+
+
+@dataclass
+class QuantileSketch:
+    compression: float = COMPRESSION
+    means: List[float] = field(default_factory=list)
+    weights: List[float] = field(default_factory=list)
+    minimum: float = math.inf
+    maximum: float = -math.inf
+    buffer: List[float] = field(default_factory=list, repr=False)
+
+    @classmethod
+    def from_values(
+        cls, values: Iterable[float], compression: float = COMPRESSION
+    ) -> "QuantileSketch":
+        sketch = cls(compression)
+        for value in values:
+            sketch.add(value)
+        return sketch
+
+    @property
+    def count(self) -> float:
+        return sum(self.weights) + len(self.buffer)
+
+    @property
+    def mean(self) -> float:
+        # Exact, merging centroids keeps their weighted sum
+        total = sum(m * w for m, w in zip(self.means, self.weights)) + sum(self.buffer)
+        return total / self.count if self.count else 0.0
+
+    def add(self, value: float) -> None:
+        self.buffer.append(value)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        if len(self.buffer) >= BUFFER_SIZE:
+            self.compress()
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        # Sketches of different shards combine into the sketch of their union
+        other.compress()
+        self.means.extend(other.means)
+        self.weights.extend(other.weights)
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self.compress(force=True)
+        return self
+
+    def _scale(self, q: float) -> float:
+        # k1 scale function: small centroids at the tails, where p99 is read
+        return self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0), 1) - 1)
+
+    def compress(self, force: bool = False) -> None:
+        if not self.buffer and not force:
+            return
+        points = sorted(
+            zip(self.means + self.buffer, self.weights + [1.0] * len(self.buffer))
+        )
+        self.buffer = []
+        if not points:
+            return
+        total = sum(weight for _, weight in points)
+
+        means, weights = [], []
+        mean, weight = points[0]
+        before = 0.0  # Weight of the centroids already emitted
+        lower = self._scale(0)
+        for next_mean, next_weight in points[1:]:
+            if self._scale((before + weight + next_weight) / total) - lower <= 1:
+                mean += (next_mean - mean) * next_weight / (weight + next_weight)
+                weight += next_weight
+                continue
+            means.append(mean)
+            weights.append(weight)
+            before += weight
+            lower = self._scale(before / total)
+            mean, weight = next_mean, next_weight
+        means.append(mean)
+        weights.append(weight)
+        self.means, self.weights = means, weights
+
+    def quantile(self, q: float) -> float:
+        self.compress()
+        if not self.weights:
+            return 0.0
+        if len(self.weights) == 1:
+            return self.means[0]
+        target = q * sum(self.weights)
+        # Each centroid sits at the middle of its weight, min and max bound the tails
+        cumulative = 0.0
+        previous_center, previous_mean = 0.0, self.minimum
+        for mean, weight in zip(self.means, self.weights):
+            center = cumulative + weight / 2
+            if target < center:
+                span = center - previous_center
+                ratio = (target - previous_center) / span if span else 0.0
+                return previous_mean + (mean - previous_mean) * ratio
+            previous_center, previous_mean = center, mean
+            cumulative += weight
+        span = cumulative - previous_center
+        ratio = (target - previous_center) / span if span else 1.0
+        return previous_mean + (self.maximum - previous_mean) * min(ratio, 1.0)
+
+    def quantiles(self, *qs: float) -> List[float]:
+        return [round(self.quantile(q), 2) for q in qs]
+
+    def to_dict(self) -> Dict[str, Union[float, List[float]]]:
+        self.compress()
+        return {
+            "compression": self.compression,
+            "means": [round(mean, 4) for mean in self.means],
+            "weights": self.weights,
+            "min": self.minimum if self.weights else None,
+            "max": self.maximum if self.weights else None,
+        }
+
+    @classmethod
+    def from_dict(
+        cls, values: Dict[str, Union[float, List[float]]]
+    ) -> "QuantileSketch":
+        return cls(
+            values.get("compression", COMPRESSION),
+            list(values.get("means", [])),
+            list(values.get("weights", [])),
+            values.get("min") if values.get("min") is not None else math.inf,
+            values.get("max") if values.get("max") is not None else -math.inf,
+        )
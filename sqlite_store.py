@@ -0,0 +1,377 @@
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+import json
+import logging
+import sqlite3
+import sys
+
+from data_structure import Model, Models, aligned
+from suites import is_correct, load_suite
+
+# Usage, latency and timestamp are NULL when unknown: runs imported from older results,
+# truncated responses
+RUNS_TABLE = """
+CREATE TABLE IF NOT EXISTS {} (
+    id INTEGER PRIMARY KEY,
+    model_id INTEGER NOT NULL REFERENCES models(id),
+    timestamp TEXT,
+    score REAL NOT NULL,
+    completion_tokens INTEGER,
+    prompt_tokens INTEGER,
+    cached_tokens INTEGER,
+    cost REAL,
+    recovery TEXT,
+    details_ref TEXT,
+    latency REAL,
+    provider TEXT,
+    request_id TEXT
+);
+"""
+SCHEMA = (
+    """
+CREATE TABLE IF NOT EXISTS models (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+"""
+    + RUNS_TABLE.format("runs")
+    + """
+CREATE TABLE IF NOT EXISTS answers (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    model_id INTEGER NOT NULL REFERENCES models(id),
+    word INTEGER NOT NULL,
+    answer TEXT,
+    correct INTEGER NOT NULL,
+    PRIMARY KEY (run_id, word)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS runs_model_timestamp ON runs(model_id, timestamp);
+CREATE INDEX IF NOT EXISTS answers_word_model ON answers(word, model_id);
+"""
+)
+
+
+class SQLiteStore:
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        # One connection per process, WAL lets several benchmark sessions write at once
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(SCHEMA)
+        self._migrate()
+        self._model_ids: Dict[str, int] = {}
+
+    def _migrate(self) -> None:
+        # Columns added after the first version of the schema
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(runs)")}
+        if "details_ref" not in columns:
+            self.connection.execute("ALTER TABLE runs ADD COLUMN details_ref TEXT")
+        if "latency" not in columns:
+            self.connection.execute(
+                "ALTER TABLE runs ADD COLUMN latency REAL NOT NULL DEFAULT 0"
+            )
+        if "provider" not in columns:
+            self.connection.execute("ALTER TABLE runs ADD COLUMN provider TEXT")
+        if "request_id" not in columns:
+            self.connection.execute("ALTER TABLE runs ADD COLUMN request_id TEXT")
+        not_null = {
+            row[1]
+            for row in self.connection.execute("PRAGMA table_info(runs)")
+            if row[3]
+        }
+        if "completion_tokens" in not_null:
+            self._rebuild_runs()
+
+    def _rebuild_runs(self) -> None:
+        # Usage and latency were NOT NULL DEFAULT 0 and SQLite can't drop a constraint:
+        # the runs are copied into a table of the current schema. Zeros stored before stay.
+        columns = ", ".join(
+            row[1] for row in self.connection.execute("PRAGMA table_info(runs)")
+        )
+        self.connection.execute("PRAGMA foreign_keys=OFF")  # answers reference runs
+        self.connection.executescript(
+            "BEGIN;"
+            + RUNS_TABLE.format("runs_new")
+            + f"INSERT INTO runs_new ({columns}) SELECT {columns} FROM runs;"
+            "DROP TABLE runs;"
+            "ALTER TABLE runs_new RENAME TO runs;"
+            "COMMIT;"
+        )
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(SCHEMA)  # Indexes of the dropped table
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _model_id(self, name: str) -> int:
+        if name not in self._model_ids:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO models (name) VALUES (?)", (name,)
+            )
+            (self._model_ids[name],) = self.connection.execute(
+                "SELECT id FROM models WHERE name = ?", (name,)
+            ).fetchone()
+        return self._model_ids[name]
+
+    def _insert_run(
+        self,
+        model_name: str,
+        timestamp: Optional[str],
+        score: float,
+        completion_tokens: Optional[int],
+        proposition: Dict[str, str],
+        solution: Optional[Dict[str, str]],
+        recovery: Optional[Dict[str, Union[str, int]]],
+        prompt_tokens: Optional[int],
+        cached_tokens: Optional[int],
+        cost: Optional[float],
+        details_ref: Optional[str] = None,
+        latency: Optional[float] = 0.0,
+        provider: Optional[str] = None,
+        request_id: Optional[str] = None,
+    ) -> int:
+        model_id = self._model_id(model_name)
+        run_id = self.connection.execute(
+            "INSERT INTO runs (model_id, timestamp, score, completion_tokens, prompt_tokens, "
+            "cached_tokens, cost, recovery, details_ref, latency, provider, request_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                model_id,
+                timestamp,
+                score,
+                completion_tokens,
+                prompt_tokens,
+                cached_tokens,
+                cost,
+                json.dumps(recovery) if recovery else None,
+                details_ref,
+                latency,
+                provider,
+                request_id,
+            ),
+        ).lastrowid
+
+        answers = []
+        for word, answer in proposition.items():
+            if not word.isdigit():
+                continue
+            expected = solution.get(word) if solution else None
+            correct = expected is not None and is_correct(answer, expected)
+            answers.append((run_id, model_id, int(word), answer, int(correct)))
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?)", answers
+        )
+        return run_id
+
+    def add_run(
+        self,
+        model_name: str,
+        timestamp: Optional[str],
+        score: float,
+        completion_tokens: Optional[int],
+        proposition: Dict[str, str],
+        solution: Optional[Dict[str, str]] = None,
+        recovery: Optional[Dict[str, Union[str, int]]] = None,
+        prompt_tokens: Optional[int] = 0,
+        cached_tokens: Optional[int] = 0,
+        cost: Optional[float] = 0.0,
+        latency: float = 0.0,
+        details_ref: Optional[str] = None,
+        provider: Optional[str] = None,
+        request_id: Optional[str] = None,
+    ) -> int:
+        with self.connection:  # One transaction per run
+            return self._insert_run(
+                model_name,
+                timestamp,
+                score,
+                completion_tokens,
+                proposition,
+                solution,
+                recovery,
+                prompt_tokens,
+                cached_tokens,
+                cost,
+                details_ref,
+                latency,
+                provider,
+                request_id,
+            )
+
+    def load_models(self, models: Models) -> None:
+        # Rebuild the in-memory Models (plots, summary) from the database
+        runs: Dict[str, List[sqlite3.Row]] = {}
+        self.connection.row_factory = sqlite3.Row
+        try:
+            for row in self.connection.execute(
+                "SELECT runs.*, models.name FROM runs JOIN models ON models.id = runs.model_id "
+                "ORDER BY runs.id"
+            ):
+                runs.setdefault(row["name"], []).append(row)
+
+            propositions: Dict[int, Dict[str, str]] = {}
+            for run_id, word, answer in self.connection.execute(
+                "SELECT run_id, word, answer FROM answers"
+            ):
+                propositions.setdefault(run_id, {})[str(word)] = answer
+        finally:
+            self.connection.row_factory = None
+
+        for name, rows in runs.items():
+            Model(
+                name,
+                [row["score"] for row in rows],
+                [row["completion_tokens"] for row in rows],
+                propositions=[propositions.get(row["id"], {}) for row in rows],
+                recoveries=[json.loads(row["recovery"] or "{}") for row in rows],
+                prompt_tokens=[row["prompt_tokens"] for row in rows],
+                cached_tokens=[row["cached_tokens"] for row in rows],
+                costs=[row["cost"] for row in rows],
+                timestamps=[row["timestamp"] for row in rows],
+                details_refs=[row["details_ref"] for row in rows],
+                latencies=[row["latency"] or 0.0 for row in rows],  # 0: not measured
+                providers=[row["provider"] for row in rows],
+                request_ids=[row["request_id"] for row in rows],
+                owner=models,
+            )
+
+    def import_json(self, path: Path, solution: Optional[Dict[str, str]] = None) -> int:
+        with open(path, "r", encoding="utf-8") as f:
+            raw_results = json.load(f)
+
+        imported = 0
+        with self.connection:
+            for name, values in raw_results.items():
+                model_id = self._model_id(name)
+                if self.connection.execute(
+                    "SELECT 1 FROM runs WHERE model_id = ? LIMIT 1", (model_id,)
+                ).fetchone():
+                    logging.info(f"{name} already has runs in {self.path}, skipped.")
+                    continue
+
+                scores = values.get("scores") or []
+                columns = {
+                    key: values.get(key) or []
+                    for key in (
+                        "completions_tokens",
+                        "propositions",
+                        "recoveries",
+                        "prompt_tokens",
+                        "cached_tokens",
+                        "costs",
+                        "timestamps",
+                        "details_refs",
+                        "latencies",
+                        "providers",
+                        "request_ids",
+                    )
+                }
+
+                def at(key: str, index: int, default=None):
+                    # Values older than a list (or cut from it) are unknown and stored as NULL
+                    return aligned(columns[key], len(scores), index, default)
+
+                for i, score in enumerate(scores):
+                    self._insert_run(
+                        name,
+                        at("timestamps", i),  # Undated, see runs_since
+                        score,
+                        at("completions_tokens", i),
+                        at("propositions", i, {}),
+                        solution,
+                        at("recoveries", i),
+                        at("prompt_tokens", i),
+                        at("cached_tokens", i),
+                        at("costs", i),
+                        at("details_refs", i),
+                        at("latencies", i) or None,  # 0 meant not measured
+                        at("providers", i),
+                        at("request_ids", i),
+                    )
+                    imported += 1
+
+        logging.info(f"Imported {imported} runs from {path}.")
+        return imported
+
+    ## Query API ##
+
+    def word_history(
+        self, model_name: str, word: int
+    ) -> List[Tuple[Optional[str], str, bool]]:
+        # (timestamp, answer, correct) for each run of a model on one word
+        rows = self.connection.execute(
+            "SELECT runs.timestamp, answers.answer, answers.correct FROM answers "
+            "JOIN runs ON runs.id = answers.run_id "
+            "WHERE answers.word = ? AND answers.model_id = "
+            "(SELECT id FROM models WHERE name = ?) ORDER BY runs.id",
+            (word, model_name),
+        )
+        return [
+            (timestamp, answer, bool(correct)) for timestamp, answer, correct in rows
+        ]
+
+    def word_accuracy(self, word: int) -> List[Tuple[str, float, int]]:
+        # (model, success rate in %, answer count) on one word, best first
+        return self.connection.execute(
+            "SELECT models.name, 100.0 * AVG(answers.correct), COUNT(*) FROM answers "
+            "JOIN models ON models.id = answers.model_id WHERE answers.word = ? "
+            "GROUP BY answers.model_id ORDER BY 2 DESC",
+            (word,),
+        ).fetchall()
+
+    def runs_since(
+        self, since: datetime, model_pattern: str = "%", undated: bool = False
+    ) -> List[Tuple[str, Optional[str], float, Optional[int]]]:
+        # (model, timestamp, score, completion tokens), model_pattern is a LIKE pattern: "%gemini%"
+        # undated adds the runs imported without a timestamp, first
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc)
+        return self.connection.execute(
+            "SELECT models.name, runs.timestamp, runs.score, runs.completion_tokens "
+            "FROM models JOIN runs ON runs.model_id = models.id "
+            "WHERE models.name LIKE ? AND (runs.timestamp >= ? "
+            "OR (? AND runs.timestamp IS NULL)) "
+            "ORDER BY runs.timestamp, runs.id",
+            (model_pattern, since.isoformat(timespec="seconds"), undated),
+        ).fetchall()
+
+    def model_scores(self) -> List[Tuple[str, float, float, int]]:
+        # (model, average score, average completion tokens, run count), best first
+        return self.connection.execute(
+            "SELECT models.name, AVG(runs.score), AVG(runs.completion_tokens), COUNT(*) "
+            "FROM models JOIN runs ON runs.model_id = models.id "
+            "GROUP BY models.id ORDER BY 2 DESC"
+        ).fetchall()
+
+    def provider_stats(
+        self, model_pattern: str = "%"
+    ) -> List[Tuple[str, Optional[str], int, float, float, float]]:
+        # (model, provider, runs, average score, average latency, tokens/s) per routed provider
+        # The choices of a request share its latency, it is summed once per request
+        return self.connection.execute(
+            "SELECT models.name, requests.provider, SUM(requests.runs), "
+            "SUM(requests.score) / SUM(requests.runs), "
+            "SUM(requests.latency * requests.timed) / NULLIF(SUM(requests.timed), 0), "
+            "SUM(requests.tokens) / NULLIF(SUM(requests.latency), 0) "
+            "FROM models JOIN ("
+            "SELECT model_id, provider, COUNT(*) AS runs, SUM(score) AS score, "
+            "MAX(latency) AS latency, SUM(latency > 0) AS timed, "
+            "SUM(CASE WHEN latency > 0 THEN completion_tokens END) AS tokens "
+            "FROM runs GROUP BY model_id, provider, COALESCE(request_id, id)"
+            ") AS requests ON requests.model_id = models.id "
+            "WHERE models.name LIKE ? GROUP BY models.id, requests.provider "
+            "ORDER BY models.name, 6 DESC",
+            (model_pattern,),
+        ).fetchall()
+
+
+if __name__ == "__main__":
+    # python sqlite_store.py v2 v2/results.db: import the results.json of a suite
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    suite = load_suite(sys.argv[1])
+    store = SQLiteStore(Path(sys.argv[2]) if len(sys.argv) > 2 else suite.results_db)
+    store.import_json(suite.results_file, suite.solution)
+    store.close()
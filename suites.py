@@ -0,0 +1,100 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+import importlib.util
+
+ROOT = Path(__file__).parent
+# Suite name -> directory whose consts.py defines it
+# (PROMPT, SOLUTION, LABELS, scoring, paths)
+SUITES: Dict[str, Path] = {
+    "v1": ROOT / "v1",
+    "v2": ROOT / "v2",
+}
+
+
+def is_correct(answer: Optional[str], expected: str) -> bool:
+    return answer_points(answer, expected, 1) > 0
+
+
+def answer_points(
+    answer: Optional[str], expected: str, alternative_points: float
+) -> float:
+    if answer == expected:
+        return 1
+    if expected.startswith("[") and expected.endswith("]"):  # Example: [A;N]
+        options = expected[1:-1].split(";")
+        if answer in options:  # Guess a pitch accent within multiple choices
+            return alternative_points
+    return 0
+
+
+def prompt_words(prompt: str) -> Dict[str, str]:
+    # "12. 姿" lines of the prompt
+    lines = (line.split(". ", 1) for line in prompt.splitlines())
+    return {
+        parts[0]: parts[1].strip()
+        for parts in lines
+        if parts[0].isdigit() and len(parts) == 2
+    }
+
+
+@dataclass
+class Suite:
+    name: str
+    prompt: str
+    solution: Dict[str, str]
+    words: Dict[str, str]
+    labels: List[str]
+    alternative_points: float  # Points for an answer within several valid ones
+    score_as_percent: bool  # Otherwise, scores are points out of len(solution)
+    random_score: Optional[float]
+    results_file: Path
+    results_db: Optional[Path]
+    details_dir: Path
+    report_file: Path
+
+    def score(self, proposition: Dict[str, str]) -> float:
+        points = sum(
+            answer_points(proposition.get(index), expected, self.alternative_points)
+            for index, expected in self.solution.items()
+        )
+        if self.score_as_percent:
+            return points * 100 / len(self.solution)  # Convert to percentage
+        return points
+
+    def is_label(self, answer: str) -> bool:
+        if answer.startswith("[") and answer.endswith("]"):
+            return all(option in self.labels for option in answer[1:-1].split(";"))
+        return answer in self.labels
+
+    @property
+    def score_title(self) -> str:
+        if not self.score_as_percent:
+            return f"Scores (out of {len(self.solution)})"
+        title = f"Success Rate (%) ({len(self.solution)} questions"
+        if self.random_score is not None:
+            title += f", Random = {self.random_score}%"
+        return title + ")"
+
+
+def load_suite(name: str) -> Suite:
+    # consts.py modules are loaded by path, several suites can live in one process
+    path = SUITES[name] / "consts.py"
+    spec = importlib.util.spec_from_file_location(f"suite_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    return Suite(
+        name=name,
+        prompt=module.PROMPT,
+        solution=module.SOLUTION,
+        words=getattr(module, "WORDS", None) or prompt_words(module.PROMPT),
+        labels=module.LABELS,
+        alternative_points=module.ALTERNATIVE_POINTS,
+        score_as_percent=module.SCORE_AS_PERCENT,
+        random_score=getattr(module, "RANDOM_SCORE", None),
+        results_file=module.RESULTS_FILE,
+        results_db=getattr(module, "RESULTS_DB", None),
+        details_dir=module.DETAILS_DIR,
+        report_file=module.REPORT_FILE,
+    )
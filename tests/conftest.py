@@ -0,0 +1,61 @@
+from http.server import ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List
+import threading
+
+import pytest
+
+import main
+import mock_server
+from backends import BACKENDS, DEFAULT_BACKEND
+from data_structure import Models
+from suites import Suite
+
+
+@pytest.fixture
+def make_results(tmp_path) -> Callable[..., Models]:
+    # Models of a small suite whose files live in tmp_path
+    def make(
+        solution: Dict[str, str],
+        labels: List[str] = ["H", "A", "N", "O"],
+        alternative_points: float = 1,
+        score_as_percent: bool = True,
+    ) -> Models:
+        suite = Suite(
+            name="test",
+            prompt="\n".join(f"{index}. word{index}" for index in solution),
+            solution=solution,
+            words={index: f"word{index}" for index in solution},
+            labels=labels,
+            alternative_points=alternative_points,
+            score_as_percent=score_as_percent,
+            random_score=None,
+            results_file=tmp_path / "results.json",
+            results_db=None,
+            details_dir=tmp_path / "details",
+            report_file=tmp_path / "report.html",
+        )
+        return Models(suite)
+
+    return make
+
+
+@pytest.fixture
+def mock_endpoint(monkeypatch) -> Iterator[ThreadingHTTPServer]:
+    # mock_server.py on a free port, as the default backend of a fresh session
+    server = ThreadingHTTPServer(("127.0.0.1", 0), mock_server.Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(
+        BACKENDS[DEFAULT_BACKEND],
+        "base_url",
+        f"http://127.0.0.1:{server.server_address[1]}/api/v1",
+    )
+    monkeypatch.setattr(main, "RETRY_BACKOFF", 0.0)
+    monkeypatch.setattr(main, "single_sample_models", set())
+    monkeypatch.setattr(main, "drift_monitors", {})
+    monkeypatch.setattr(main, "backend_stats", main.defaultdict(main.BackendStats))
+    monkeypatch.setattr(mock_server, "seen_prompts", set())
+    monkeypatch.setattr(mock_server, "throttled_requests", mock_server.Counter())
+    yield server
+    server.shutdown()
+    server.server_close()
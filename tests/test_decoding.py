@@ -0,0 +1,123 @@
+import json
+
+from decoding import decode_proposition, salvage_messages
+
+RESPONSE = {
+    "details": "Checked each word.",
+    "proposition": [
+        {"word_num": "1", "answer": "A"},
+        {"word_num": "2", "answer": "H"},
+        {"word_num": "3", "answer": "[N2;O]"},
+    ],
+}
+PROPOSITION = {"1": "A", "2": "H", "3": "[N2;O]"}
+
+
+def test_strict():
+    decoded = decode_proposition(json.dumps(RESPONSE))
+    assert decoded.mode == "strict"
+    assert decoded.proposition == PROPOSITION
+    assert decoded.details == "Checked each word."
+    assert (decoded.recovered, decoded.dropped) == (3, 0)
+
+
+def test_fenced():
+    decoded = decode_proposition(f"```json\n{json.dumps(RESPONSE)}\n```")
+    assert decoded.mode == "salvaged"
+    assert decoded.proposition == PROPOSITION
+    assert decoded.details == "Checked each word."
+
+
+def test_fenced_without_closing_fence():
+    decoded = decode_proposition(f"```json\n{json.dumps(RESPONSE)}")
+    assert decoded.proposition == PROPOSITION
+
+
+def test_trailing_text():
+    content = f"Here is my answer:\n{json.dumps(RESPONSE)}\nHope this helps!"
+    decoded = decode_proposition(content)
+    assert decoded.mode == "salvaged"
+    assert decoded.proposition == PROPOSITION
+    assert decoded.details == "Checked each word."
+
+
+def test_truncated():
+    content = json.dumps(RESPONSE)
+    cut = content.index('{"word_num": "3"') + 20  # Inside the third element
+    decoded = decode_proposition(content[:cut])
+    assert decoded.mode == "salvaged"
+    assert decoded.proposition == {"1": "A", "2": "H"}
+    assert decoded.details == "Checked each word."
+
+
+def test_dict_shaped():
+    content = json.dumps(
+        {"details": "", "proposition": {"1": " a ", "2.": "n2", "3": "[h; o]"}}
+    )
+    decoded = decode_proposition(content)
+    assert decoded.proposition == {"1": "A", "2": "N2", "3": "[H;O]"}
+
+
+def test_broken_elements_are_dropped():
+    content = json.dumps(
+        {
+            "proposition": [
+                {"word_num": "1", "answer": "A"},
+                {"word_num": "two", "answer": "H"},
+                {"Word-Num": "3", "Answer": "o"},
+            ]
+        }
+    )
+    decoded = decode_proposition(content)
+    assert decoded.proposition == {"1": "A", "3": "O"}
+    assert (decoded.recovered, decoded.dropped) == (2, 1)
+
+
+def test_empty():
+    for content in ("", "I don't know.", '{"details": "nothing"}'):
+        decoded = decode_proposition(content)
+        assert decoded.mode == "empty"
+        assert decoded.proposition == {}
+
+
+def test_details_of_broken_object():
+    content = (
+        '{"details": "kept", "proposition": [{"word_num": "1", "answer": "A"}, {"wo'
+    )
+    decoded = decode_proposition(content)
+    assert decoded.details == "kept"
+    assert decoded.proposition == {"1": "A"}
+
+
+def test_details_without_colon():
+    # The string after a malformed "details" key is not the details
+    decoded = decode_proposition('{"details" "oops", "x": "1"}')
+    assert decoded.details == ""
+
+
+def test_salvage_truncated_body():
+    content = json.dumps(RESPONSE)
+    body = json.dumps(
+        {
+            "id": "gen-1",
+            "choices": [
+                {"message": {"role": "assistant", "content": content}},
+                {"message": {"role": "assistant", "content": content}},
+            ],
+            "usage": {"completion_tokens": 100},
+        }
+    ).encode()
+    second = body.rindex(b'"content"')
+    cut = body[: second + 120]  # Inside the proposition of the second choice
+    messages = salvage_messages(cut)
+    assert len(messages) == 2
+    assert decode_proposition(messages[0]["content"]).proposition == PROPOSITION
+    assert decode_proposition(messages[1]["content"]).proposition == {"1": "A"}
+
+
+def test_salvage_cut_escape():
+    # Cut right after the backslash of an escaped quote, then inside a \u escape
+    body = '{"choices": [{"message": {"content": "{\\"details\\": \\"a \\'
+    assert salvage_messages(body) == [{"content": '{"details": "a '}]
+    body = '{"choices": [{"message": {"content": "caf\\u00'
+    assert salvage_messages(body) == [{"content": "caf"}]
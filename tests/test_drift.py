@@ -0,0 +1,94 @@
+import math
+
+import pytest
+
+from data_structure import Model
+from drift import Cusum, DriftMonitor, binomial_tail, check_recent
+
+SOLUTION = {"1": "A", "2": "H"}
+RIGHT = {"1": "A", "2": "H"}
+WRONG = {"1": "A", "2": "A"}  # Scores 50
+
+
+def add_runs(model, proposition, count, latency=1.0):
+    for _ in range(count):
+        model.add_score(proposition, 100, latency=latency)
+
+
+def test_cusum():
+    cusum = Cusum(0.0, 1.0, direction=-1)
+    # Increases and drifts within the slack never add up
+    assert not any(cusum.update(value) for value in (3.0, -0.5, 0.0, -0.4))
+    assert cusum.statistic == 0.0
+    # Each drop of 1.5 std adds 1 once the slack is taken off
+    assert [cusum.update(-1.5) for _ in range(6)] == [False] * 5 + [True]
+    assert cusum.alarm == 10
+    assert cusum.statistic == pytest.approx(6.0)
+    assert not cusum.update(-1.5)  # Raised once
+    assert cusum.recent_mean == pytest.approx((3.0 - 0.9 - 1.5 * 7) / 11)
+
+
+def test_binomial_tail():
+    assert binomial_tail(0, 5, 0.3) == pytest.approx(1.0)
+    assert binomial_tail(3, 3, 0.5) == pytest.approx(0.125)
+    assert binomial_tail(2, 3, 0.5) == pytest.approx(0.5)
+    assert binomial_tail(4, 3, 0.5) == 0
+
+
+def test_from_history(make_results):
+    results = make_results(SOLUTION)
+    # Latencies were only recorded for the latest runs
+    model = Model(
+        "model",
+        [100.0] * 4 + [50.0] * 6,
+        [100] * 10,
+        propositions=[RIGHT] * 10,
+        latencies=[1.0, 2.0, 1.0, 2.0, 1.0],
+        owner=results,
+    )
+    monitor = DriftMonitor.from_history(model)
+    assert monitor.seen == 10
+    assert monitor.score.mean == 70.0
+    assert monitor.latency.mean == pytest.approx(math.log(2) * 2 / 5)
+    assert monitor.majorities == {"1": ("A", 1 / 12), "2": ("H", 1 / 12)}
+
+    short = DriftMonitor.from_history(model, history=4)
+    assert short.score is None and short.latency is None and not short.majorities
+
+
+def test_observe(make_results):
+    results = make_results(SOLUTION)
+    model = results.get_model("model")
+    add_runs(model, RIGHT, 10)
+    monitor = DriftMonitor.from_history(model)
+
+    assert monitor.observe(model) == []  # Nothing new
+
+    add_runs(model, WRONG, 1, latency=2.0)
+    assert monitor.observe(model) == [
+        "score dropped to 50.00 from 100.00",
+        "latency rose to 2.00s from 1.00s",
+    ]
+    assert monitor.flipped_words() == []  # One flip is still likely
+
+    add_runs(model, WRONG, 1, latency=2.0)
+    assert monitor.observe(model) == ["1 word(s) flipped: 2 (not H 2/2)"]
+    assert monitor.flipped_words() == [("2", "H", 2, 2)]
+    assert monitor.drifted
+
+
+def test_check_recent(make_results):
+    results = make_results(SOLUTION)
+    add_runs(results.get_model("stable"), RIGHT, 12)
+    drifting = results.get_model("drifting")
+    add_runs(drifting, RIGHT, 8)
+    add_runs(drifting, WRONG, 4)
+    add_runs(results.get_model("new"), WRONG, 4)  # No history before its recent runs
+
+    monitors = {monitor.name: monitor for monitor in check_recent(results, 4)}
+    assert set(monitors) == {"stable", "drifting"}
+    assert not monitors["stable"].drifted
+    assert monitors["drifting"].drifted
+    assert monitors["drifting"].describe() == (
+        "score 100.00 -> 50.00, flipped 2 (not H 4/4)"
+    )
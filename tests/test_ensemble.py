@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from ensemble import Ballots, ensemble_curve, vote_curve, word_confidence
+
+SOLUTION = {"1": "A", "2": "H", "3": "N"}
+RUNS = [  # Two thirds right, except the last run
+    {"1": "A", "2": "H", "3": "O"},
+    {"1": "A", "2": "A", "3": "N"},
+    {"1": "H", "2": "H", "3": "N"},
+    {"1": "A", "2": "H", "3": "N"},
+]
+
+
+def add_runs(results, name, propositions):
+    model = results.get_model(name)
+    for proposition in propositions:
+        model.add_score(proposition, 100)
+    return model
+
+
+def test_vote_curve(make_results):
+    results = make_results(SOLUTION)
+    model = add_runs(results, "model", RUNS)
+    curve = vote_curve(Ballots(results), model)
+    assert curve.k == [1, 2, 3, 4]
+    assert curve.votes == [4, 2, 1, 1]
+    # k=1 is the average score, ties of k=2 go to the first run of each pair
+    assert curve.scores == pytest.approx([75.0, 66.67, 100.0, 100.0], abs=0.01)
+    assert curve.tokens == [100, 200, 300, 400]
+
+
+def test_majority_ignores_missing_answers(make_results):
+    results = make_results(SOLUTION)
+    add_runs(results, "model", RUNS)
+    ballots = Ballots(results)
+    a, h = ballots.answers.index("A"), ballots.answers.index("H")
+    codes = np.array([[-1, -1, -1], [-1, h, -1], [a, h, -1]])  # Voters x words
+    assert ballots.majority(codes).tolist() == [a, h, -1]
+    # Ties go to the answer of the first voter
+    assert ballots.majority(np.array([[h, a, -1], [a, h, -1]])).tolist() == [h, a, -1]
+
+
+def test_ensemble_curve(make_results):
+    results = make_results(SOLUTION)
+    add_runs(results, "good", RUNS)
+    add_runs(results, "bad", [{"1": "O", "2": "O", "3": "O"}] * 2)
+    add_runs(results, "worse", [{"1": "O", "2": "O", "3": "H"}] * 2)
+    curve = ensemble_curve(Ballots(results), results)
+    assert [m for m, _, _ in curve] == [1, 2, 3]
+    assert [members[-1] for _, _, members in curve] == ["good", "bad", "worse"]
+    # Two models tie on every word and the best one wins, three outvote it but on
+    # the three-way tie of word 3
+    assert [score for _, score, _ in curve] == pytest.approx([100.0, 100.0, 33.33])
+
+
+def test_word_confidence(make_results):
+    results = make_results(SOLUTION)
+    add_runs(results, "model", RUNS)
+    rows = {row.index: row for row in word_confidence(Ballots(results))}
+    assert rows["1"].majority == "A"
+    assert rows["1"].agreement == 0.75
+    assert rows["1"].entropy == pytest.approx(0.811, abs=0.001)
+    assert rows["1"].accuracy == 75.0
+    assert rows["3"].majority == "N"
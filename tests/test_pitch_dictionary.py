@@ -0,0 +1,74 @@
+import json
+import logging
+import zipfile
+
+import pytest
+
+from pitch_dictionary import (
+    PitchDictionary,
+    accent_label,
+    alternatives,
+    pattern_position,
+)
+
+BANK = [
+    ["青い", "pitch", {"reading": "あおい", "pitches": [{"position": 2}]}],
+    ["唯", "pitch", {"reading": "ただ", "pitches": [{"position": 1}]}],
+    ["唯", "pitch", {"reading": "ゆい", "pitches": [{"position": 0}]}],
+    ["橋", "pitch", {"reading": "はし", "pitches": [{"position": 2}]}],
+    ["箸", "pitch", {"reading": "はし", "pitches": [{"position": 1}]}],
+    ["雨", "pitch", {"reading": "あめ", "pitches": [{"position": "HLL"}]}],
+    ["飴", "pitch", {"reading": "あめ", "pitches": [{"position": 0}]}],
+    ["雨", "freq", {"reading": "あめ", "frequency": 1}],
+]
+
+
+@pytest.fixture
+def dictionary(tmp_path):
+    source = tmp_path / "pitch.zip"
+    with zipfile.ZipFile(source, "w") as archive:
+        archive.writestr("index.json", "{}")
+        archive.writestr("term_meta_bank_1.json", json.dumps(BANK))
+    dictionary = PitchDictionary(tmp_path / "pitch.db")
+    assert dictionary.import_banks(source) == 7
+    yield dictionary
+    dictionary.close()
+
+
+def test_labels():
+    assert pattern_position("LHHL") == 3
+    assert pattern_position("LHH") == 0
+    assert [accent_label(p, 4) for p in (0, 1, 2, 4)] == ["H", "A", "N", "O"]
+    assert accent_label(3, 4, numbered=True) == "N3"
+    # Canonical order whatever the order of the dictionary
+    assert alternatives(["O", "N3", "A", "N2", "A", "H"]) == "[H;A;N2;N3;O]"
+    assert alternatives(["N", "A"]) == alternatives(["A", "N"]) == "[A;N]"
+    assert alternatives(["A", "A"]) == "A"
+    assert alternatives([]) is None
+
+
+def test_lookup(dictionary):
+    assert dictionary.lookup("青い") == [("あおい", 2)]
+    assert dictionary.lookup("雨") == [("あめ", 1)]
+    # Readings are only a fallback for kana-only words
+    assert dictionary.lookup("あおい") == [("あおい", 2)]
+    assert dictionary.lookup("赤い") == []
+    # An explicit reading selects among the entries of the word, it is never a fallback
+    assert dictionary.lookup("唯", "ただ") == [("ただ", 1)]
+    assert dictionary.lookup("赤い", "あおい") == []
+
+
+def test_lookup_warns_on_several_words(dictionary, caplog):
+    with caplog.at_level(logging.WARNING):
+        assert dictionary.lookup("ハシ") == [("はし", 2), ("はし", 1)]
+    assert "Read as several words (橋/箸)" in caplog.text
+
+
+def test_solution(dictionary):
+    solution, missing = dictionary.solution(
+        ["青い", "唯", "唯[ゆい]", "あめ", "唯[ただし]"]
+    )
+    assert solution == {"1": "N", "2": "[H;A]", "3": "H", "4": "[H;A]"}
+    assert [accent.word for accent in missing] == ["唯"]
+    numbered, _ = dictionary.solution({"7": "青い"}, numbered=True)
+    assert numbered == {"7": "N2"}
@@ -0,0 +1,46 @@
+import pytest
+
+SOLUTION = {"1": "A", "2": "H"}
+PROPOSITION = {"1": "A", "2": "A"}
+
+
+def add_requests(model, samples, requests, seconds_per_sample):
+    # Requests of n samples at the same speed: n times the tokens in n times the time
+    for request in range(requests):
+        for _ in range(samples):
+            model.add_score(
+                PROPOSITION,
+                100,
+                latency=samples * seconds_per_sample,
+                provider="Provider",
+                request_id=f"{model.name}-{request}",
+            )
+
+
+@pytest.fixture
+def results(make_results, tmp_path):
+    results = make_results(SOLUTION)
+    results.use_sqlite(tmp_path / "results.db")
+    add_requests(results.get_model("n=1"), 1, 4, 2.0)
+    add_requests(results.get_model("n=4"), 4, 1, 2.0)
+    # Runs recorded before request ids were, one request each
+    legacy = results.get_model("legacy")
+    for _ in range(2):
+        legacy.add_score(PROPOSITION, 100, latency=2.0, provider="Provider")
+    yield results
+    results.store.close()
+
+
+def test_tokens_per_second_counts_requests_once(results):
+    stats = {name: row for name, *row in results.get_provider_stats()}
+    assert stats["n=1"] == ["Provider", 4, 50.0, 2.0, 50.0]
+    assert stats["n=4"] == ["Provider", 4, 50.0, 8.0, 50.0]
+    assert stats["legacy"] == ["Provider", 2, 50.0, 2.0, 50.0]
+    assert results.dico["n=4"].tokens_per_second() == 50.0
+
+
+def test_sqlite_tokens_per_second_counts_requests_once(results):
+    stats = {name: row for name, *row in results.store.provider_stats()}
+    assert stats["n=1"] == pytest.approx(["Provider", 4, 50.0, 2.0, 50.0])
+    assert stats["n=4"] == pytest.approx(["Provider", 4, 50.0, 8.0, 50.0])
+    assert stats["legacy"] == pytest.approx(["Provider", 2, 50.0, 2.0, 50.0])
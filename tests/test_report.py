@@ -0,0 +1,57 @@
+import pytest
+
+from ensemble import Ballots, word_confidence
+from report import ModelRow, aggregate, cheapest_reaching, pareto_front
+
+
+def row(name, score, tokens, latency=0.0):
+    return ModelRow(name, 1, score, 0.0, tokens, latency, 0.0, 0.0, 0.0, [], [])
+
+
+ROWS = [
+    row("small", 60.0, 100, 2.0),
+    row("medium", 80.0, 300, 1.0),
+    row("wasteful", 70.0, 500, 3.0),  # Beaten by medium on both
+    row("large", 95.0, 900, 4.0),
+    row("unmeasured", 99.0, 0),  # No cost recorded, left out
+]
+
+
+def tokens(row):
+    return row.tokens
+
+
+def latency(row):
+    return row.latency
+
+
+def test_pareto_front():
+    assert [r.name for r in pareto_front(ROWS, tokens)] == ["small", "medium", "large"]
+    assert [r.name for r in pareto_front(ROWS, latency)] == ["medium", "large"]
+
+
+def test_cheapest_reaching():
+    assert cheapest_reaching(ROWS, tokens, 60).name == "small"
+    assert cheapest_reaching(ROWS, tokens, 75).name == "medium"
+    assert cheapest_reaching(ROWS, tokens, 80).name == "medium"
+    assert cheapest_reaching(ROWS, latency, 50).name == "medium"
+    assert cheapest_reaching(ROWS, tokens, 99) is None
+
+
+def test_word_accuracy_counts_alternative_points(make_results):
+    # v1 style: an answer within the alternatives earns half a point
+    results = make_results({"1": "[A;H]", "2": "N"}, alternative_points=0.5)
+    model = results.get_model("model")
+    for proposition in ({"1": "A", "2": "N"}, {"1": "[A;H]", "2": "N"}, {"2": "O"}):
+        model.add_score(proposition, 100)
+
+    _, word_rows = aggregate(results)
+    rows = {row.index: row for row in word_rows}
+    assert rows["1"].accuracy == 50.0  # 0.5 + 1 + missing, over three runs
+    assert rows["1"].top_wrong == "A (1)"
+    assert rows["2"].accuracy == pytest.approx(66.67, abs=0.01)
+    confidence = {row.index: row.accuracy for row in word_confidence(Ballots(results))}
+    assert [round(row.accuracy, 2) for row in word_rows] == [
+        confidence["1"],
+        confidence["2"],
+    ]
@@ -0,0 +1,162 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import main
+from backends import DEFAULT_BACKEND
+import mock_server
+
+SOLUTION = {"1": "A", "2": "H", "3": "N"}
+MODEL = "mock/model"
+
+
+class Chunks(httpx.AsyncByteStream):
+    def __init__(self, *chunks: bytes) -> None:
+        self.chunks = chunks
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def read_capped(limit, *chunks):
+    response = httpx.Response(200, stream=Chunks(*chunks))
+    return asyncio.run(main.read_capped(response, limit))
+
+
+def query(results, samples, model_names=[MODEL]):
+    asyncio.run(main.query_models([results], model_names, samples=samples))
+    return results.dico.get(model_names[0])
+
+
+def response_size(results, samples):
+    # Bytes of a mock response to the suite's prompt, give or take the provider name
+    request = {"model": MODEL, "messages": [{"content": results.suite.prompt}]}
+    return len(json.dumps(mock_server.completion({**request, "n": samples})))
+
+
+def test_read_capped():
+    assert read_capped(9, b"abc", b"def", b"ghi") == (b"abcdefghi", False)
+    assert read_capped(5, b"abc", b"def", b"ghi") == (b"abcde", True)
+    assert read_capped(5, b"") == (b"", False)
+
+
+def test_truncated_usage_is_unknown(make_results, mock_endpoint, monkeypatch):
+    results = make_results(SOLUTION)
+    # Cut in the usage block, after every choice
+    monkeypatch.setattr(main, "MAX_RESPONSE_BYTES", response_size(results, 4) - 100)
+    model = query(results, 4)
+    assert model.run_count == 4
+    assert model.completions_tokens == [None] * 4
+    assert model.costs == [None] * 4
+    assert model.token_sketch.count == 0
+    assert (model.avg_token_usage, model.avg_cost) == (0.0, 0.0)
+    assert MODEL not in main.single_sample_models
+
+
+def test_truncated_without_choices_keeps_n(make_results, mock_endpoint, monkeypatch):
+    # Nothing salvaged from a cut n-sample body: the model did not ignore "n"
+    results = make_results(SOLUTION)
+    monkeypatch.setattr(main, "MAX_RESPONSE_BYTES", 40)
+    assert query(results, 4) is None
+    assert MODEL not in main.single_sample_models
+
+
+def test_split_usage():
+    messages = [{"content": "x" * 30}, {"content": "x" * 10}, {"content": ""}]
+    usage = {
+        "completion_tokens": 80,
+        "prompt_tokens": 100,
+        "prompt_tokens_details": {"cached_tokens": 50},
+        "cost": 0.9,
+    }
+    usages = main.split_usage(usage, messages)
+    # Completion tokens follow the output length, the prompt was sent once for all
+    assert [u["completion_tokens"] for u in usages] == [60, 20, 0]
+    assert [u["prompt_tokens"] for u in usages] == [34, 33, 33]
+    assert [u["cached_tokens"] for u in usages] == [17, 17, 16]
+    assert [u["cost"] for u in usages] == pytest.approx([0.47, 0.265, 0.165])
+    assert main.split_usage(usage, []) == []
+
+
+def test_cached_tokens_and_cost(make_results, mock_endpoint):
+    # The mock endpoint caches a prompt marked with cache_control once it has seen it
+    results = make_results(SOLUTION)
+    query(results, 4)
+    model = query(results, 4)
+    prompt_tokens = len(results.suite.prompt) // 2
+    assert model.run_count == 8
+    assert (
+        model.prompt_tokens
+        == [prompt_tokens // 4 + (i < prompt_tokens % 4) for i in range(4)] * 2
+    )
+    assert model.cached_tokens == [0] * 4 + model.prompt_tokens[4:]
+    assert model.cache_hit_rate == 50.0
+
+    prices = mock_server.PRICES
+    first, second = model.completions_tokens[:4], model.completions_tokens[4:]
+    assert sum(model.costs[:4]) == pytest.approx(
+        prompt_tokens * prices["prompt"] + sum(first) * prices["completion"]
+    )
+    assert sum(model.costs[4:]) == pytest.approx(
+        prompt_tokens * prices["cached"] + sum(second) * prices["completion"]
+    )
+
+
+def stats():
+    return main.backend_stats[DEFAULT_BACKEND]
+
+
+def test_n_rejected():
+    for message in (
+        "'n' must be 1 for this model",
+        "n must be less than or equal to 1",
+        'Unsupported parameter: "n"',
+        "This model only supports one completion choice",
+        "Multiple candidates are not supported",
+    ):
+        assert main.N_REJECTED.search(message), message
+    for message in ("mock/invalid is not a valid model ID", "Invalid JSON"):
+        assert not main.N_REJECTED.search(message), message
+
+
+def test_samples_in_one_request(make_results, mock_endpoint):
+    model = query(make_results(SOLUTION), 4)
+    assert model.run_count == 4
+    assert (stats().requests, stats().failures) == (1, 0)
+    assert len(set(model.request_ids)) == 1
+
+
+def test_throttled_requests_are_retried(make_results, mock_endpoint):
+    # Retry-After: 0, the request is sent again as is
+    model = query(make_results(SOLUTION), 4, ["mock/throttled"])
+    assert model.run_count == 4
+    assert (stats().requests, stats().failures) == (1, 1)
+    assert "mock/throttled" not in main.single_sample_models
+
+
+def test_rejected_n_falls_back_to_single_samples(make_results, mock_endpoint):
+    results = make_results(SOLUTION)
+    model = query(results, 4, ["mock/no-n"])
+    assert model.run_count == 4
+    assert (stats().requests, stats().failures) == (4, 1)
+    assert "mock/no-n" in main.single_sample_models
+    # The rest of the session sends one request per sample straight away
+    model = query(results, 4, ["mock/no-n"])
+    assert (stats().requests, stats().failures) == (8, 1)
+    assert model.run_count == 8
+
+
+def test_fewer_choices_fall_back_to_single_samples(make_results, mock_endpoint):
+    model = query(make_results(SOLUTION), 4, ["mock/one-choice"])
+    assert model.run_count == 4
+    assert stats().requests == 4  # One choice, then the three missing samples
+    assert "mock/one-choice" in main.single_sample_models
+
+
+def test_other_errors_do_not_fall_back(make_results, mock_endpoint):
+    assert query(make_results(SOLUTION), 4, ["mock/invalid"]) is None
+    assert (stats().requests, stats().failures) == (0, 1)
+    assert "mock/invalid" not in main.single_sample_models
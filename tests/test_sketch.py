@@ -0,0 +1,115 @@
+import bisect
+import random
+
+import pytest
+
+from data_structure import RECENT_SAMPLES, Model, aligned
+from sketch import QuantileSketch
+
+
+def rank(values, value):
+    # Share of the sorted values at or below value
+    return bisect.bisect_right(values, value) / len(values)
+
+
+@pytest.fixture
+def samples():
+    rng = random.Random(0)
+    return [rng.lognormvariate(7, 1) for _ in range(20000)]  # Heavy tailed, like tokens
+
+
+def test_quantile_accuracy(samples):
+    sketch = QuantileSketch.from_values(samples)
+    ordered = sorted(samples)
+    for q in (0.01, 0.5, 0.9, 0.99, 0.999):
+        assert rank(ordered, sketch.quantile(q)) == pytest.approx(q, abs=0.005)
+    assert sketch.quantile(0) == ordered[0]
+    assert sketch.quantile(1) == ordered[-1]
+    assert sketch.mean == pytest.approx(sum(samples) / len(samples))
+    assert len(sketch.means) <= sketch.compression
+
+
+def test_merge(samples):
+    shards = [QuantileSketch.from_values(samples[i::4]) for i in range(4)]
+    merged = shards[0]
+    for shard in shards[1:]:
+        merged.merge(shard)
+    ordered = sorted(samples)
+    assert merged.count == len(samples)
+    assert (merged.minimum, merged.maximum) == (ordered[0], ordered[-1])
+    for q in (0.5, 0.9, 0.99):
+        assert rank(ordered, merged.quantile(q)) == pytest.approx(q, abs=0.005)
+    assert merged.mean == pytest.approx(sum(samples) / len(samples))
+
+
+def test_round_trip(samples):
+    sketch = QuantileSketch.from_values(samples)
+    restored = QuantileSketch.from_dict(sketch.to_dict())
+    assert restored.count == sketch.count
+    assert restored.quantiles(0.5, 0.9, 0.99) == pytest.approx(
+        sketch.quantiles(0.5, 0.9, 0.99), rel=1e-4
+    )
+    assert QuantileSketch.from_dict(QuantileSketch().to_dict()).quantile(0.5) == 0.0
+
+
+def test_model_merge(make_results):
+    # An older shard without latencies merged with a newer one
+    old = make_results({"1": "A"})
+    Model("model", [100.0, 0.0, 100.0], [10, 20, 30], owner=old)
+    Model("old only", [100.0], [5], owner=old)
+    new = make_results({"1": "A"})
+    Model(
+        "model",
+        [100.0, 0.0],
+        [40, 50],
+        latencies=[2.0, 4.0],
+        providers=["A", "B"],
+        owner=new,
+    )
+
+    results = old.merge(new)
+    assert set(results.dico) == {"model", "old only"}
+    model = results.dico["model"]
+    assert model.run_count == 5
+    assert model.avg_score == 60.0
+    assert model.avg_token_usage == 30.0
+    assert model.avg_latency == 3.0
+    assert model.token_sketch.count == 5
+    assert [aligned(model.latencies, 5, i, 0.0) for i in range(5)] == [
+        0.0,
+        0.0,
+        0.0,
+        2.0,
+        4.0,
+    ]
+    assert model.provider_runs() == {None: [0, 1, 2], "A": [3], "B": [4]}
+
+
+def test_models_merge_new_model(make_results):
+    results = make_results({"1": "A"})
+    other = make_results({"1": "A"})
+    Model("new", [100.0], [7], owner=other)
+    results.merge(other)
+    assert results.dico["new"].owner is results
+    assert results.dico["new"].avg_token_usage == 7.0
+
+
+def test_samples_are_capped(make_results):
+    results = make_results({"1": "A"})
+    model = results.get_model("model")
+    for i in range(RECENT_SAMPLES + 10):
+        model.add_score({"1": "A"}, i, latency=1.0)
+    assert model.run_count == RECENT_SAMPLES + 10
+    assert len(model.completions_tokens) == RECENT_SAMPLES
+    assert len(model.latencies) == RECENT_SAMPLES
+    assert aligned(model.completions_tokens, model.run_count, model.run_count - 1) == (
+        RECENT_SAMPLES + 9
+    )
+    # Averages and quantiles still cover every run
+    assert model.token_sketch.count == RECENT_SAMPLES + 10
+    assert model.avg_token_usage == (RECENT_SAMPLES + 9) / 2
+
+    results.save_to_file()
+    saved = make_results({"1": "A"}).parse_results_file()
+    assert saved.dico["model"].avg_token_usage == model.avg_token_usage
+    assert len(saved.dico["model"].completions_tokens) == RECENT_SAMPLES
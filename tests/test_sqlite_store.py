@@ -0,0 +1,109 @@
+from datetime import datetime, timezone
+import json
+import sqlite3
+
+from sqlite_store import SQLiteStore
+
+SOLUTION = {"1": "A", "2": "H"}
+
+
+def write_results(path, **models):
+    path.write_text(json.dumps(models), encoding="utf-8")
+
+
+def test_import_without_timestamps(tmp_path):
+    # Runs stored before timestamps were stay undated, runs_since only returns them on request
+    results = tmp_path / "results.json"
+    write_results(
+        results,
+        old={
+            "scores": [50.0, 100.0],
+            "completions_tokens": [10, 20],
+            "propositions": [{"1": "A", "2": "A"}, {"1": "A", "2": "H"}],
+        },
+    )
+
+    store = SQLiteStore(tmp_path / "results.db")
+    assert store.import_json(results, SOLUTION) == 2
+    assert store.word_history("old", 2) == [(None, "A", False), (None, "H", True)]
+    since = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    assert store.runs_since(since) == []
+    assert store.runs_since(since, undated=True) == [
+        ("old", None, 50.0, 10),
+        ("old", None, 100.0, 20),
+    ]
+    store.close()
+
+
+def test_import_leaves_missing_values_null(tmp_path, make_results):
+    # Samples cut from the lists (RECENT_SAMPLES) are unknown, not 0
+    results = tmp_path / "results.json"
+    write_results(
+        results,
+        model={
+            "scores": [0.0, 50.0, 100.0],
+            "completions_tokens": [30, 60],
+            "latencies": [0.0, 2.0],
+        },
+    )
+    store = SQLiteStore(tmp_path / "results.db")
+    store.import_json(results, SOLUTION)
+    assert store.connection.execute(
+        "SELECT completion_tokens, latency, cost FROM runs ORDER BY id"
+    ).fetchall() == [(None, None, None), (30, None, None), (60, 2.0, None)]
+    assert store.model_scores() == [("model", 50.0, 45.0, 3)]
+
+    # Loaded back, unknown values stay out of the averages
+    models = make_results(SOLUTION)
+    store.load_models(models)
+    model = models.dico["model"]
+    assert model.avg_token_usage == 45.0
+    assert model.latencies == [0.0, 0.0, 2.0]
+    assert model.avg_cost == 0.0
+    store.close()
+
+
+def test_migrates_not_null_columns(tmp_path):
+    path = tmp_path / "results.db"
+    connection = sqlite3.connect(path)
+    connection.executescript(
+        "CREATE TABLE models (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);"
+        "CREATE TABLE runs (id INTEGER PRIMARY KEY, "
+        "model_id INTEGER NOT NULL REFERENCES models(id), timestamp TEXT, "
+        "score REAL NOT NULL, completion_tokens INTEGER NOT NULL DEFAULT 0, "
+        "prompt_tokens INTEGER NOT NULL DEFAULT 0, cached_tokens INTEGER NOT NULL DEFAULT 0, "
+        "cost REAL NOT NULL DEFAULT 0, recovery TEXT);"
+        "INSERT INTO models VALUES (1, 'model');"
+        "INSERT INTO runs VALUES (1, 1, '2026-01-01T00:00:00+00:00', 50.0, 10, 5, 0, 0.1, NULL);"
+    )
+    connection.close()
+
+    store = SQLiteStore(path)
+    store.add_run("model", None, 100.0, None, {"1": "A"}, SOLUTION, cost=None)
+    assert store.connection.execute(
+        "SELECT id, completion_tokens, cost, latency FROM runs ORDER BY id"
+    ).fetchall() == [(1, 10, 0.1, 0.0), (2, None, None, 0.0)]
+    assert store.word_accuracy(1) == [("model", 100.0, 1)]
+    assert store.connection.execute("PRAGMA foreign_key_check").fetchall() == []
+    store.close()
+
+
+def test_import_keeps_timestamps(tmp_path):
+    # Timestamps cover the latest runs only when they were added later
+    results = tmp_path / "results.json"
+    write_results(
+        results,
+        model={
+            "scores": [0.0, 50.0, 100.0],
+            "completions_tokens": [1, 2, 3],
+            "timestamps": ["2026-01-02T00:00:00+00:00", "2026-01-03T00:00:00+00:00"],
+        },
+    )
+    store = SQLiteStore(tmp_path / "results.db")
+    store.import_json(results, SOLUTION)
+    runs = store.runs_since(datetime(2026, 1, 1, tzinfo=timezone.utc))
+    assert [(timestamp, score) for _, timestamp, score, _ in runs] == [
+        ("2026-01-02T00:00:00+00:00", 50.0),
+        ("2026-01-03T00:00:00+00:00", 100.0),
+    ]
+    store.close()
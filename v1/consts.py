@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
 PROMPT = """
 Give the Tokyo-standard pitch accent (高低アクセント) of all the following japanese words, in order, in the following format.
@@ -53,27 +53,12 @@ def _build_solution_map(solution_text: str) -> Dict[int, str]:
 
 
 SOLUTION = _build_solution_map(SOLUTION_STRING)
-MODELS = [
-    "google/gemini-3-pro-preview",
-    "google/gemini-2.5-pro",
-    "google/gemini-2.5-flash",
-    "anthropic/claude-sonnet-4.5",
-    "anthropic/claude-opus-4.5"
-    "moonshotai/kimi-k2-thinking",
-    "moonshotai/kimi-k2-0905",
-    "deepseek/deepseek-chat-v3-0324",
-    "deepseek/deepseek-r1-0528",
-    "openai/gpt-5.1",
-    "openai/gpt-5.1-chat",
-    "openai/gpt-5",
-    "openai/gpt-5-chat",
-    "openai/gpt-5-mini",
-    "openai/gpt-4o",
-    "mistralai/mistral-nemo",
-    "x-ai/grok-4.1-fast",
-    "x-ai/grok-4",
-    "x-ai/grok-4-fast",
-    "openai/gpt-5.2",
-    "google/gemini-3-flash-preview"
-]
-RESULTS_FILE = Path("./results.json")
+LABELS = ["H", "A", *(f"N{mora}" for mora in range(2, 10)), "O"]
+ALTERNATIVE_POINTS = 0.5  # An answer within [A;N2] is worth half a point
+SCORE_AS_PERCENT = False  # Scores are points out of len(SOLUTION)
+RANDOM_SCORE = None
+
+RESULTS_FILE = Path(__file__).parent / "results.json"
+RESULTS_DB: Optional[Path] = None
+DETAILS_DIR = Path(__file__).parent / "details"
+REPORT_FILE = Path(__file__).parent / "report.html"
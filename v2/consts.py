@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
 PROMPT = """
 Give the Tokyo-standard pitch accent (高低アクセント) of all the following japanese words, in order, in the following format.
@@ -72,30 +72,14 @@ def _build_solution_map(solution_text: str) -> Dict[int, str]:
 
 
 SOLUTION = _build_solution_map(SOLUTION_STRING)
-MODELS = [
-    # "google/gemini-3-pro-preview",
-    "google/gemini-3.1-pro-preview",
-    # "google/gemini-3-flash-preview",
-    # "google/gemini-2.5-pro",
-    # "google/gemini-2.5-flash",
-    # "anthropic/claude-sonnet-4.5",
-    # "anthropic/claude-opus-4.5",
-    # "moonshotai/kimi-k2-thinking",
-    # "moonshotai/kimi-k2-0905",
-    # "deepseek/deepseek-chat-v3-0324",
-    # "deepseek/deepseek-r1-0528",
-    # "openai/gpt-5.2",
-    # "openai/gpt-5.2-chat",
-    # "openai/gpt-5.1",
-    # "openai/gpt-5.1-chat",
-    # "openai/gpt-5",
-    # "openai/gpt-5-chat",
-    # "openai/gpt-5-mini",
-    # "openai/gpt-4o",
-    # "mistralai/mistral-nemo",
-    # "x-ai/grok-4.1-fast",
-    # "x-ai/grok-4",
-    # "x-ai/grok-4-fast",
-    # "xiaomi/mimo-v2-flash:free"
-]
-RESULTS_FILE = Path("./v2/results.json")
+LABELS = ["H", "A", "N", "O"]
+ALTERNATIVE_POINTS = 1  # An answer within [A;H] is worth a full point
+SCORE_AS_PERCENT = True
+RANDOM_SCORE = 29  # Expected success rate of random answers, in %
+
+RESULTS_FILE = Path(__file__).parent / "results.json"
+# Set to Path(__file__).parent / "results.db" to keep results in SQLite instead (import with sqlite_store.py)
+RESULTS_DB: Optional[Path] = None
+# Compressed "details" and reasoning of each run, referenced from the results
+DETAILS_DIR = Path(__file__).parent / "details"
+REPORT_FILE = Path(__file__).parent / "report.html"
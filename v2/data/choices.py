@@ -1,8 +1,12 @@
 import numpy as np
 import json
+from contextlib import closing
 from pathlib import Path
 
+from pitch_dictionary import PITCH_DB, PitchDictionary
+
 ## This is the draft script that was used to choose the words of the benchmark ##
+# Run from the repo root: python -m v2.data.choices
 
 
 def draw_frequencies(draws: int, max_val: int) -> list[int]:
@@ -96,8 +100,21 @@ words = [
     "目指す",
     "条件",
     "去る",
-    "違い"
+    "違い",
 ]
 
 for i, w in enumerate(words, 1):
     print(f"{i}. {w}")
+
+# Solution of the chosen words, from the pitch accents imported with pitch_dictionary.py
+if PITCH_DB.exists():
+    with closing(PitchDictionary()) as dictionary:
+        solution, missing = dictionary.solution(words)
+    for accent in missing:
+        print(f"No pitch accent for {accent.word}, to fill by hand.")
+    print(
+        "SOLUTION_STRING =",
+        ",".join(solution.get(str(i), "?") for i in range(1, len(words) + 1)),
+    )
+else:
+    print("Import a pitch accent dictionary with pitch_dictionary.py for the solution.")